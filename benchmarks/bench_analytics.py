@@ -0,0 +1,35 @@
+import pytest
+from helpers import synthetic_journeys
+
+from locomotive.analytics import (
+    cheapest_flexibility,
+    cheapest_per_hour,
+    price_percentiles,
+)
+from locomotive.table import JourneyTable
+
+
+@pytest.fixture(scope="module")
+def journeys():
+    return synthetic_journeys(100000)
+
+
+@pytest.fixture(scope="module")
+def table(journeys):
+    return JourneyTable.from_journeys(journeys)
+
+
+def test_lowest_price(benchmark, journeys):
+    benchmark(lambda: [x.lowest_price for x in journeys])
+
+
+def test_cheapest_per_hour(benchmark, table):
+    benchmark(cheapest_per_hour, table)
+
+
+def test_price_percentiles(benchmark, table):
+    benchmark(price_percentiles, table)
+
+
+def test_cheapest_flexibility(benchmark, table):
+    benchmark(cheapest_flexibility, table)
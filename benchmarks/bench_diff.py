@@ -0,0 +1,37 @@
+import random
+
+import attr
+import pytest
+from helpers import fake_journeys
+
+from locomotive.diff import iter_journeys_diff, journeys_diff
+
+
+@pytest.fixture(scope="module", params=[1000, 10000])
+def journeys(request):
+    old = fake_journeys(request.param)
+    # Drop 10% of the journeys, and reprice 10% of them.
+    random.seed(0)
+    new = [x for x in old if random.random() > 0.1]
+    new = [
+        attr.evolve(x, proposals=x.proposals[::-1]) if random.random() < 0.1 else x
+        for x in new
+    ]
+    return old, new
+
+
+def test_journeys_diff(benchmark, journeys):
+    benchmark(journeys_diff, *journeys)
+
+
+@pytest.fixture(scope="module")
+def sorted_journeys(journeys):
+    return [sorted(x, key=lambda x: x.departure_date) for x in journeys]
+
+
+def test_iter_journeys_diff(benchmark, sorted_journeys):
+    benchmark(lambda: list(iter_journeys_diff(*sorted_journeys)))
+
+
+def test_iter_journeys_diff_changes_only(benchmark, sorted_journeys):
+    benchmark(lambda: list(iter_journeys_diff(*sorted_journeys, changes_only=True)))
@@ -0,0 +1,25 @@
+import pytest
+from helpers import fake_journeys
+
+from locomotive.cli.formatters import JSONFormatter, JSONLinesFormatter, PrettyFormatter
+
+
+@pytest.fixture(scope="module")
+def journeys():
+    return fake_journeys(200)
+
+
+def test_pretty_formatter(benchmark, journeys):
+    benchmark(PrettyFormatter().print, journeys, fn=lambda _: None)
+
+
+def test_json_formatter(benchmark, journeys):
+    benchmark(JSONFormatter().print, journeys, fn=lambda _: None)
+
+
+def test_json_lines_formatter(benchmark, journeys):
+    benchmark(JSONLinesFormatter().print, journeys, fn=lambda _: None)
+
+
+def test_pretty_formatter_buffered(benchmark, journeys):
+    benchmark(PrettyFormatter(buffer_size=2 ** 16).print, journeys, fn=lambda _: None)
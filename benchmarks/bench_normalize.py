@@ -0,0 +1,24 @@
+import pytest
+
+from locomotive.stores import normalize, normalize_fast, normalize_many
+
+
+@pytest.fixture(scope="module")
+def names(stations):
+    return [x[0] for x in stations.fetchall("SELECT name FROM stations")]
+
+
+def test_normalize(benchmark, names):
+    benchmark(lambda: [normalize(x) for x in names[:2000]])
+
+
+def test_normalize_fast_cold(benchmark, names):
+    def run():
+        normalize_fast.cache_clear()
+        return [normalize_fast(x) for x in names[:2000]]
+
+    benchmark(run)
+
+
+def test_normalize_many(benchmark, names):
+    benchmark(normalize_many, names)
@@ -0,0 +1,74 @@
+import json
+
+import pytest
+from helpers import StubServer, scaled_trace
+from money.currency import Currency
+from money.money import Money
+
+from locomotive.api.oui_v3 import (
+    Client,
+    loads,
+    strptime_sncf,
+    strptime_sncf_slow,
+    to_money,
+)
+from locomotive.api.transport import HTTPTransport
+
+DATE = "2019-12-26T09:04:00.000+01:00"
+
+
+@pytest.fixture(scope="module", params=[1, 10, 100])
+def trace(request):
+    return scaled_trace(request.param)
+
+
+@pytest.fixture(scope="module")
+def client(stations):
+    return Client(stations)
+
+
+def test_json_loads(benchmark, trace):
+    data = json.dumps(trace).encode()
+    benchmark(json.loads, data)
+
+
+def test_loads(benchmark, trace):
+    data = json.dumps(trace).encode()
+    benchmark(loads, data)
+
+
+def test_parse_response(benchmark, client, trace):
+    benchmark(client.parse_response, trace)
+
+
+def test_strptime_sncf_slow(benchmark):
+    benchmark(strptime_sncf_slow, DATE)
+
+
+def test_strptime_sncf(benchmark):
+    benchmark(strptime_sncf, DATE)
+
+
+def test_money(benchmark):
+    benchmark(lambda: Money(str(45.5), Currency("EUR")))
+
+
+def test_to_money(benchmark):
+    benchmark(to_money, 45.5, "EUR")
+
+
+def test_request_and_parse(benchmark, stations):
+    "Full request → decode → parse cycle, against a local stub server."
+    body = json.dumps(scaled_trace(10)).encode()
+    with StubServer(body) as server, HTTPTransport() as transport:
+        client = Client(stations, transport)
+        client.ENDPOINT = server.url
+        benchmark(lambda: client.parse_response(client.request({})))
+
+
+def test_request_stream(benchmark, stations):
+    body = json.dumps(scaled_trace(10)).encode()
+    with StubServer(body) as server, HTTPTransport() as transport:
+        client = Client(stations, transport)
+        client.ENDPOINT = server.url
+        benchmark(lambda: list(map(client.parse_journey, client.request_stream({}))))
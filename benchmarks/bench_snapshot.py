@@ -0,0 +1,47 @@
+import pickle
+
+import pytest
+from helpers import synthetic_journeys
+
+from locomotive.snapshot import Snapshot, write_snapshot
+
+
+@pytest.fixture(scope="module")
+def journeys():
+    return synthetic_journeys(100000)
+
+
+@pytest.fixture(scope="module")
+def path(tmp_path_factory, journeys):
+    path = tmp_path_factory.mktemp("snapshot") / "journeys.snap"
+    write_snapshot(path, journeys)
+    return path
+
+
+def test_write_snapshot(benchmark, tmp_path, journeys):
+    benchmark(write_snapshot, tmp_path / "journeys.snap", journeys)
+
+
+def test_open_snapshot(benchmark, path):
+    benchmark(lambda: Snapshot(path).close())
+
+
+def test_read_snapshot(benchmark, path):
+    def read():
+        with Snapshot(path) as snapshot:
+            return list(snapshot)
+
+    benchmark(read)
+
+
+def test_read_snapshot_sample(benchmark, path):
+    def read():
+        with Snapshot(path) as snapshot:
+            return snapshot[::1000]
+
+    benchmark(read)
+
+
+def test_pickle_load(benchmark, journeys):
+    data = pickle.dumps(journeys, protocol=pickle.HIGHEST_PROTOCOL)
+    benchmark(pickle.loads, data)
@@ -0,0 +1,35 @@
+import pytest
+
+from locomotive.stores import Stations
+
+QUERIES = ["FRPAR", "FRBES", "Paris", "Lyon Part Dieu", "brest", "Marseille St"]
+
+
+@pytest.fixture(scope="module")
+def uncached(stations_path):
+    return Stations(stations_path, download=False, cache_size=0)
+
+
+@pytest.fixture(scope="module")
+def indexed(stations_path):
+    return Stations(stations_path, download=False, cache_size=0, index=True)
+
+
+def test_find_by_id(benchmark, uncached):
+    benchmark(lambda: [uncached.find_by_id(x) for x in ("FRPAR", "FRBES", "FRLYS")])
+
+
+def test_find_by_name(benchmark, uncached):
+    benchmark(lambda: [uncached.find_by_name(x) for x in QUERIES[2:]])
+
+
+def test_find_by_name_index(benchmark, indexed):
+    benchmark(lambda: [indexed.find_by_name(x) for x in QUERIES[2:]])
+
+
+def test_find_cached(benchmark, stations):
+    benchmark(lambda: [stations.find(x) for x in QUERIES])
+
+
+def test_find_many(benchmark, uncached):
+    benchmark(uncached.find_many, QUERIES)
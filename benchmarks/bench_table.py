@@ -0,0 +1,46 @@
+import pytest
+from helpers import fake_journeys
+
+from locomotive.table import JourneyTable
+
+
+@pytest.fixture(scope="module")
+def journeys():
+    return fake_journeys(10000)
+
+
+@pytest.fixture(scope="module")
+def table(journeys):
+    return JourneyTable.from_journeys(journeys)
+
+
+def test_from_journeys(benchmark, journeys):
+    benchmark(JourneyTable.from_journeys, journeys)
+
+
+def test_filter_journeys(benchmark, journeys):
+    benchmark(
+        lambda: [
+            x for x in journeys if x.lowest_price and x.lowest_price.sub_units < 3000
+        ]
+    )
+
+
+def test_filter_table(benchmark, table):
+    benchmark(table.where, "price", lambda x: 0 <= x < 3000)
+
+
+def test_top_k_journeys(benchmark, journeys):
+    benchmark(
+        lambda: sorted(
+            (x for x in journeys if x.proposals), key=lambda x: x.lowest_price
+        )[:10]
+    )
+
+
+def test_top_k_table(benchmark, table):
+    benchmark(table.top_k, 10)
+
+
+def test_group_by_table(benchmark, table):
+    benchmark(table.group_by, "destination")
@@ -0,0 +1,24 @@
+import shutil
+from pathlib import Path
+
+import pytest
+
+from locomotive.stores import Stations
+
+BUNDLED_STATIONS = Path(__file__).parent.parent / "locomotive/data/stations.sqlite3"
+
+
+@pytest.fixture(scope="session")
+def stations_path(tmp_path_factory):
+    """
+    Copy of the bundled stations database, which is upgraded in place
+    when opened, and must not be modified.
+    """
+    path = tmp_path_factory.mktemp("stations") / "stations.sqlite3"
+    shutil.copyfile(str(BUNDLED_STATIONS), str(path))
+    return path
+
+
+@pytest.fixture(scope="session")
+def stations(stations_path):
+    return Stations(stations_path, download=False)
@@ -0,0 +1,135 @@
+"""
+Fixtures shared by the benchmarks.
+"""
+
+import copy
+import datetime as dt
+import json
+import random
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from pathlib import Path
+from socketserver import ThreadingMixIn
+from typing import List
+
+from faker import Faker
+from money.currency import Currency
+from money.money import Money
+
+from locomotive.models import Journey, Proposal, Segment, Station, Transport
+
+TRACE = Path(__file__).parent.parent / "tests/traces/ios_oui6904_frlys_frnte.res.json"
+
+
+def scaled_trace(scale: int) -> dict:
+    """
+    The recorded OUI v3 response, with `scale` times its journeys,
+    and a price for each proposal.
+    """
+    res = json.loads(TRACE.read_text())
+    journeys = []
+    for i in range(scale):
+        for journey in res["journeys"]:
+            journey = copy.deepcopy(journey)
+            journey["proposals"] = [
+                {
+                    "flexibility": flexibility,
+                    "price": {"value": 20 + (i % 80) + j / 2, "currency": "EUR"},
+                }
+                for j, flexibility in enumerate(["NOFLEX", "SEMIFLEX", "FLEX"])
+            ]
+            journeys.append(journey)
+    res["journeys"] = journeys
+    return res
+
+
+def fake_journeys(n: int, seed: int = 42) -> List[Journey]:
+    "Reproducible list of `n` fake journeys."
+    random.seed(seed)
+    Faker.seed(seed)
+    return [Journey.fake() for _ in range(n)]
+
+
+def synthetic_journeys(n: int) -> List[Journey]:
+    """
+    `n` journeys from Brest to 10 destinations, every 10 minutes,
+    with 1 to 3 proposals. Faster to build than `fake_journeys`.
+    """
+    origin = Station("Brest", "brest", "FRBES", "BST", 48.38, -4.48)
+    destinations = [
+        Station(
+            "Station {}".format(i),
+            "station {}".format(i),
+            "FRX{:02}".format(i),
+            "",
+            0,
+            0,
+        )
+        for i in range(10)
+    ]
+    start = dt.datetime(2020, 1, 1)
+    journeys = []
+    for i in range(n):
+        departure = start + dt.timedelta(minutes=10 * i)
+        segment = Segment(
+            Transport("TGA", "TGV", str(1000 + i % 9000), "TRAIN"),
+            origin,
+            destinations[i % 10],
+            departure,
+            departure + dt.timedelta(hours=3),
+        )
+        proposals = tuple(
+            Proposal(
+                level,
+                Money.from_sub_units(
+                    1000 + (i * 7919 + j * 104729) % 9000, Currency.EUR
+                ),
+            )
+            for j, level in enumerate(["NOFLEX", "SEMIFLEX", "FLEX"][: 1 + i % 3])
+        )
+        journeys.append(Journey((segment,), proposals))
+    return journeys
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    "Reply to any request with `body`."
+
+    protocol_version = "HTTP/1.1"
+    body = b"{}"
+
+    def do_GET(self) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def do_POST(self) -> None:
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.do_GET()
+
+    def log_message(self, *args) -> None:  # type: ignore
+        pass
+
+
+class StubServer(ThreadingMixIn, HTTPServer):
+    "Local HTTP server replying with `body` to every request."
+
+    daemon_threads = True
+
+    def __init__(self, body: bytes) -> None:
+        handler = type("Handler", (StubHandler,), {"body": body})
+        super().__init__(("127.0.0.1", 0), handler)
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return "http://127.0.0.1:{}".format(self.server_port)
+
+    def __enter__(self) -> "StubServer":
+        self.thread.start()
+        return self
+
+    def __exit__(self, *args) -> None:  # type: ignore
+        self.shutdown()
+        self.server_close()
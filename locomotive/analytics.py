@@ -0,0 +1,120 @@
+"""
+Fare analytics over journey tables.
+
+All prices are in cents, as stored in `JourneyTable`, in a single currency,
+and journeys without proposals are ignored.
+"""
+
+import datetime as dt
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from .models import Journey
+from .table import NO_PRICE, JourneyTable
+
+Route = Tuple[str, str]
+
+
+def as_table(journeys: Union[JourneyTable, Iterable[Journey]]) -> JourneyTable:
+    if isinstance(journeys, JourneyTable):
+        return journeys
+    return JourneyTable.from_journeys(journeys)
+
+
+def cheapest_per_hour(journeys: Union[JourneyTable, Iterable[Journey]]) -> JourneyTable:
+    """
+    The cheapest journey departing in each hour, sorted by departure.
+    Hours are aligned on UTC, which is the same as French time.
+    """
+    table = as_table(journeys)
+    departure, price = table.columns["departure"], table.columns["price"]
+    best: Dict[int, int] = {}
+    for i, (ts, cents) in enumerate(zip(departure, price)):
+        if cents == NO_PRICE:
+            continue
+        hour = ts - ts % 3600
+        j = best.get(hour)
+        if j is None or cents < price[j]:
+            best[hour] = i
+    return table.take(best[x] for x in sorted(best))
+
+
+def percentile(values: List[int], q: float) -> float:
+    "Linear interpolation between the closest ranks of sorted `values`."
+    position = (len(values) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def price_percentiles(
+    journeys: Union[JourneyTable, Iterable[Journey]],
+    percentiles: Iterable[float] = (10, 50, 90),
+) -> Dict[Route, Dict[float, float]]:
+    "Percentiles of the lowest prices of each (origin, destination) route."
+    table = as_table(journeys)
+    strings = table.store.strings.values
+    prices: Dict[Tuple[int, int], List[int]] = {}
+    columns = table.columns
+    for origin, destination, cents in zip(
+        columns["origin"], columns["destination"], columns["price"]
+    ):
+        if cents != NO_PRICE:
+            prices.setdefault((origin, destination), []).append(cents)
+    percentiles = list(percentiles)
+    result = {}
+    for (origin, destination), values in prices.items():
+        values.sort()
+        result[strings[origin], strings[destination]] = {
+            q: percentile(values, q) for q in percentiles
+        }
+    return result
+
+
+def cheapest_flexibility(
+    journeys: Union[JourneyTable, Iterable[Journey]],
+) -> List[Optional[str]]:
+    """
+    Flexibility level of the cheapest proposal of each journey
+    (the first one in case of ties), or None for journeys without proposals.
+    """
+    table = as_table(journeys)
+    store = table.store
+    start, price = store.proposals_start, store.price
+    flexibility, strings = store.flexibility_level, store.strings.values
+    levels: List[Optional[str]] = []
+    for row in table.columns["row"]:
+        begin, end = start[row], start[row + 1]
+        if begin == end:
+            levels.append(None)
+            continue
+        best = min(range(begin, end), key=price.__getitem__)
+        levels.append(strings[flexibility[best]])
+    return levels
+
+
+def track_cheapest_per_day(
+    journeys: Iterable[Journey], cheapest: Dict[dt.date, Journey]
+) -> Iterator[Journey]:
+    """
+    Yield the journeys, and record the cheapest journey departing
+    on each day in `cheapest`, e.g. to report it once they are printed.
+    """
+    for journey in journeys:
+        price = journey.lowest_price
+        day = journey.departure_date.date()
+        if price is not None:
+            best = cheapest.get(day)
+            if best is None or price < best.lowest_price:
+                cheapest[day] = journey
+        yield journey
+
+
+def cheapest_per_day(journeys: Iterable[Journey]) -> Dict[dt.date, Journey]:
+    """
+    The cheapest journey departing on each day (the first one in case of ties),
+    e.g. of the journeys of `TravelClient.travel_request_range`.
+    """
+    cheapest: Dict[dt.date, Journey] = {}
+    for _ in track_cheapest_per_day(journeys, cheapest):
+        pass
+    return cheapest
@@ -0,0 +1,200 @@
+"""
+Batch search of many origin/destination pairs.
+"""
+
+import csv
+import datetime as dt
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+
+import attr
+import dateparser as dp
+
+from ..models import Journey, Passenger
+from ..stores import Stations
+from .client import TravelClient
+from .ratelimit import Limiter
+from .requests import TravelRequest
+
+logger = logging.getLogger(__name__)
+
+
+@attr.s(frozen=True)
+class BatchItem:
+    "An origin/destination pair to search, as station names or codes."
+
+    origin: str = attr.ib()
+    destination: str = attr.ib()
+    date: dt.datetime = attr.ib()
+
+
+@attr.s(frozen=True)
+class BatchResult:
+    "The journeys of a batch item, or the error raised when searching them."
+
+    item: BatchItem = attr.ib()
+    request: TravelRequest = attr.ib()
+    journeys: List[Journey] = attr.ib()
+    error: Optional[Exception] = attr.ib(default=None)
+
+
+def read_batch_csv(path: Union[str, Path], tz: str = "Europe/Paris") -> List[BatchItem]:
+    """
+    Read batch items from a CSV file with `origin`, `destination` and `date` columns.
+    Dates are in the `tz` timezone if not specified (e.g. 2020-01-01T08:00).
+    """
+    settings = {"TIMEZONE": tz, "RETURN_AS_TIMEZONE_AWARE": True}
+    items = []
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            date = dp.parse(row["date"], settings=settings)
+            if date is None:
+                raise ValueError("Cannot parse date {!r}".format(row["date"]))
+            items.append(BatchItem(row["origin"], row["destination"], date))
+    return items
+
+
+class LimitedClient(TravelClient):
+    """
+    Apply limiters around each request (page) sent by a `TravelClient`.
+    """
+
+    def __init__(self, client: TravelClient, limiters: List[Limiter]) -> None:
+        self.client = client
+        self.limiters = limiters
+        self.max_iter = client.max_iter
+
+    def travel_request(self, req: TravelRequest) -> List[Journey]:
+        return self.__limited(0, req)
+
+    def travel_request_key(self, req: TravelRequest) -> str:
+        return self.client.travel_request_key(req)
+
+    def __limited(self, i: int, req: TravelRequest) -> List[Journey]:
+        if i == len(self.limiters):
+            return self.client.travel_request(req)
+        with self.limiters[i]:
+            return self.__limited(i + 1, req)
+
+
+class BatchSearch:
+    """
+    Search the full day of many origin/destination pairs, in parallel.
+
+    At most `max_workers` requests are in flight, and at most `rate` requests
+    per second are sent, for this batch. The `endpoint_concurrency` and
+    `endpoint_rate` limits are shared by all the batches sent to the same
+    API endpoint, and set by the first of them.
+
+    With a `checkpoint` file, the keys of the completed requests are recorded,
+    and they are skipped when the batch is run again, for example after a crash.
+    A result is recorded once the next one is requested, so that results which
+    may not have been processed by the caller are fetched again.
+    """
+
+    # Limiters shared between batches, by endpoint, and their limits.
+    endpoints: Dict[str, Tuple[Limiter, Tuple[Optional[int], Optional[float]]]] = {}
+    endpoints_lock = threading.Lock()
+
+    def __init__(
+        self,
+        client: TravelClient,
+        stations: Stations,
+        max_workers: int = 8,
+        rate: Optional[float] = None,
+        endpoint_concurrency: Optional[int] = None,
+        endpoint_rate: Optional[float] = None,
+        checkpoint: Optional[Union[str, Path]] = None,
+    ) -> None:
+        self.client = client
+        self.stations = stations
+        self.max_workers = max_workers
+        self.checkpoint = Path(checkpoint) if checkpoint else None
+        limiters = [Limiter(rate=rate)]
+        if endpoint_concurrency or endpoint_rate:
+            endpoint = getattr(client, "ENDPOINT", type(client).__name__)
+            limits = (endpoint_concurrency, endpoint_rate)
+            with self.endpoints_lock:
+                if endpoint not in self.endpoints:
+                    self.endpoints[endpoint] = (Limiter(*limits), limits)
+                limiter, current = self.endpoints[endpoint]
+            if current != limits:
+                logger.warning(
+                    "Limits of %s already set to %s, ignoring %s",
+                    endpoint,
+                    current,
+                    limits,
+                )
+            limiters.append(limiter)
+        self.limited = LimitedClient(client, limiters)
+
+    def run(
+        self,
+        items: Iterable[Union[BatchItem, Tuple[str, str, dt.datetime]]],
+        passengers: Optional[List[Passenger]] = None,
+        travel_class: str = "second",
+    ) -> Iterator[BatchResult]:
+        "Yield the results of the batch items as they complete."
+        batch = [x if isinstance(x, BatchItem) else BatchItem(*x) for x in items]
+        passengers = passengers or [Passenger.dummy()]
+
+        # Resolve all the stations at once, before sending any request.
+        names = {x.origin for x in batch} | {x.destination for x in batch}
+        stations = self.stations.find_many_or_raise(names)
+
+        done = self.__read_checkpoint()
+        requests = []
+        for item in batch:
+            req = TravelRequest(
+                departure_station=stations[item.origin],
+                arrival_station=stations[item.destination],
+                passengers=passengers,
+                date=item.date,
+                travel_class=travel_class,
+            )
+            key = self.client.travel_request_key(req)
+            if key not in done:
+                done.add(key)
+                requests.append((key, item, req))
+
+        with ThreadPoolExecutor(self.max_workers) as executor:
+            futures = {
+                executor.submit(self.limited.travel_request_full, req): (key, item, req)
+                for key, item, req in requests
+            }
+            try:
+                for future in as_completed(futures):
+                    key, item, req = futures[future]
+                    try:
+                        result = BatchResult(item, req, future.result())
+                    except Exception as e:  # pylint: disable=broad-except
+                        yield BatchResult(item, req, [], e)
+                        continue
+                    yield result
+                    self.__write_checkpoint(key)
+            finally:
+                for future in futures:
+                    future.cancel()
+
+    def __read_checkpoint(self) -> Set[str]:
+        if not (self.checkpoint and self.checkpoint.exists()):
+            return set()
+        keys = set()
+        with self.checkpoint.open() as f:
+            for line in f:
+                try:
+                    keys.add(json.loads(line)["key"])
+                except ValueError:
+                    # Line truncated by a crash.
+                    continue
+        return keys
+
+    def __write_checkpoint(self, key: str) -> None:
+        if not self.checkpoint:
+            return
+        with self.checkpoint.open("a") as f:
+            f.write(json.dumps({"key": key}) + "\n")
@@ -0,0 +1,227 @@
+"""
+Response caches for the API clients.
+
+`CachedClient` wraps any `BoardClient`/`TravelClient` and serves repeated
+requests from a cache backend, keyed on the client's canonical request key.
+"""
+
+import logging
+import pickle
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, List, Optional, Set, TypeVar, Union
+
+import attr
+
+from ..cache import MISSING, LRUCache
+from ..models import BoardEntry, Journey
+from .client import BoardClient, TravelClient
+from .requests import BoardRequest, TravelRequest
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+@attr.s(slots=True, frozen=True)
+class CacheEntry:
+    value: Any = attr.ib()
+    # Timestamps (as returned by `time.time()`) after which the entry
+    # is considered stale, and after which it is no longer served.
+    expires: float = attr.ib()
+    stale_until: float = attr.ib()
+
+
+@attr.s(slots=True)
+class ResponseCacheStats:
+    hits: int = attr.ib(default=0)
+    stale_hits: int = attr.ib(default=0)
+    misses: int = attr.ib(default=0)
+    refreshes: int = attr.ib(default=0)
+    errors: int = attr.ib(default=0)
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.stale_hits + self.misses
+        return (self.hits + self.stale_hits) / total if total else 0.0
+
+
+class MemoryCache:
+    """
+    In-memory LRU cache backend.
+    """
+
+    def __init__(self, maxsize: int = 1024) -> None:
+        self.entries = LRUCache(maxsize)
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        entry = self.entries.get(key)
+        return None if entry is MISSING else entry
+
+    def put(self, key: str, entry: CacheEntry) -> None:
+        self.entries.put(key, entry)
+
+    def clear(self) -> None:
+        self.entries.clear()
+
+    def close(self) -> None:
+        pass
+
+
+class SQLiteCache:
+    """
+    On-disk cache backend, shared between processes.
+    Values are pickled and entries are purged once they can no longer be served.
+    """
+
+    schema = """
+    CREATE TABLE IF NOT EXISTS responses (
+        key TEXT PRIMARY KEY,
+        value BLOB NOT NULL,
+        expires REAL NOT NULL,
+        stale_until REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS responses_stale_until ON responses (stale_until);
+    """
+
+    def __init__(self, path: Union[str, Path]) -> None:
+        self.path = Path(path)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+        with self.conn:
+            self.conn.execute("PRAGMA journal_mode = WAL")
+            self.conn.executescript(self.schema)
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT value, expires, stale_until FROM responses WHERE key = ?",
+                (key,),
+            ).fetchone()
+        if row is None:
+            return None
+        return CacheEntry(pickle.loads(row[0]), row[1], row[2])
+
+    def put(self, key: str, entry: CacheEntry) -> None:
+        value = pickle.dumps(entry.value, protocol=pickle.HIGHEST_PROTOCOL)
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)",
+                (key, value, entry.expires, entry.stale_until),
+            )
+
+    def purge(self, now: Optional[float] = None) -> int:
+        "Remove the entries that can no longer be served."
+        now = time.time() if now is None else now
+        with self.lock, self.conn:
+            cur = self.conn.execute(
+                "DELETE FROM responses WHERE stale_until <= ?", (now,)
+            )
+        return cur.rowcount
+
+    def clear(self) -> None:
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM responses")
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+class CachedClient(BoardClient, TravelClient):
+    """
+    Serve repeated requests from a cache.
+
+    Responses are fresh for `ttl` seconds. For `stale_ttl` more seconds,
+    the stale response is returned immediately and refreshed in the background
+    (stale-while-revalidate). Older entries are fetched again synchronously.
+    """
+
+    def __init__(
+        self,
+        client: Union[BoardClient, TravelClient],
+        backend: Optional[Union[MemoryCache, SQLiteCache]] = None,
+        ttl: float = 300,
+        stale_ttl: float = 0,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.client = client
+        self.backend = backend or MemoryCache()
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.clock = clock
+        self.stats = ResponseCacheStats()
+        self.lock = threading.Lock()
+        self.refreshing: Set[str] = set()
+        self.executor = ThreadPoolExecutor(max_workers=4)
+
+    def board_request(self, req: BoardRequest) -> List[BoardEntry]:
+        assert isinstance(self.client, BoardClient)
+        client = self.client
+        key = "board:" + client.board_request_key(req)
+        return self.__cached(key, lambda: client.board_request(req))
+
+    def travel_request(self, req: TravelRequest) -> List[Journey]:
+        assert isinstance(self.client, TravelClient)
+        client = self.client
+        key = "travel:" + client.travel_request_key(req)
+        return self.__cached(key, lambda: client.travel_request(req))
+
+    def invalidate(self) -> None:
+        self.backend.clear()
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=True)
+        self.backend.close()
+
+    def __enter__(self) -> "CachedClient":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def __cached(self, key: str, fetch: Callable[[], T]) -> T:
+        now = self.clock()
+        entry = self.backend.get(key)
+        if entry is not None and now < entry.expires:
+            self.__count("hits")
+            return entry.value  # type: ignore
+        if entry is not None and now < entry.stale_until:
+            self.__count("stale_hits")
+            self.__refresh(key, fetch)
+            return entry.value  # type: ignore
+        self.__count("misses")
+        return self.__fetch(key, fetch)
+
+    def __fetch(self, key: str, fetch: Callable[[], T]) -> T:
+        value = fetch()
+        now = self.clock()
+        expires = now + self.ttl
+        self.backend.put(key, CacheEntry(value, expires, expires + self.stale_ttl))
+        return value
+
+    def __refresh(self, key: str, fetch: Callable[[], Any]) -> None:
+        with self.lock:
+            if key in self.refreshing:
+                return
+            self.refreshing.add(key)
+            self.stats.refreshes += 1
+        self.executor.submit(self.__refresh_task, key, fetch)
+
+    def __refresh_task(self, key: str, fetch: Callable[[], Any]) -> None:
+        try:
+            self.__fetch(key, fetch)
+        except Exception:
+            # Keep serving the stale entry, it will be fetched
+            # synchronously once it expires.
+            logger.warning("Failed to refresh cache entry %s", key, exc_info=True)
+            self.__count("errors")
+        finally:
+            with self.lock:
+                self.refreshing.discard(key)
+
+    def __count(self, name: str) -> None:
+        with self.lock:
+            setattr(self.stats, name, getattr(self.stats, name) + 1)
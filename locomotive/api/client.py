@@ -3,13 +3,17 @@ We use mulitple inheritance to allow the implementation
 of clients supporting several types of requests.
 """
 
+import asyncio
+import datetime as dt
 import logging
-from typing import Iterator, List, Set
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Set
 
 import attr
 
 from ..models import BoardEntry, Journey
-from .requests import BoardRequest, TravelRequest
+from .requests import BoardRequest, TravelRequest, request_key
 
 
 class BoardClient:
@@ -17,8 +21,16 @@ class BoardClient:
         "Request the arrival or departure board for a train station."
         raise NotImplementedError
 
+    def board_request_key(self, req: BoardRequest) -> str:
+        "Key identifying identical board requests, for caching."
+        return request_key(req)
+
 
 class TravelClient:
+    # Maximum number of pages fetched for a day, or a time window,
+    # to avoid sending too many requests in case something goes wrong.
+    max_iter = 10
+
     def travel_request(self, req: TravelRequest) -> List[Journey]:
         """
         Request the available journeys and prices
@@ -26,27 +38,51 @@ class TravelClient:
         """
         raise NotImplementedError
 
-    def travel_request_iter(self, req: TravelRequest) -> Iterator[Journey]:
-        "Iteratively fetch a full day."
+    def travel_request_key(self, req: TravelRequest) -> str:
+        "Key identifying identical travel requests, for caching."
+        return request_key(req)
+
+    def travel_request_stream(self, req: TravelRequest) -> Iterator[Journey]:
+        """
+        Same as `travel_request`, but yield the journeys as soon as they
+        are received, for clients that support it.
+        """
+        yield from self.travel_request(req)
+
+    def travel_request_iter(
+        self, req: TravelRequest, stream: bool = False
+    ) -> Iterator[Journey]:
+        """
+        Iteratively fetch a full day.
+        With `stream`, the journeys are yielded as soon as they are received,
+        in the order of the response, instead of page by page.
+        """
         # TODO: Verify date overlaps and timezones...
         cur_dt = req.date.replace(hour=0, minute=0, second=0)
         journeys: Set[Journey] = set()
 
-        # Finite loop to avoid sending too many requests
-        # in case something goes wrong.
-        max_iter = 10
-
-        for _ in range(max_iter):
+        for _ in range(self.max_iter):
             # 1) Fetch results for the current date, and abort if no results.
             cur_req = attr.evolve(req, date=cur_dt)
-            journeys_ = self.travel_request(cur_req)
-            if not journeys_:
-                break
+            if stream:
+                # 2) Yield new results as soon as they are received.
+                journeys_ = []
+                for journey in self.travel_request_stream(cur_req):
+                    journeys_.append(journey)
+                    if journey not in journeys:
+                        journeys.add(journey)
+                        yield journey
+                if not journeys_:
+                    break
+            else:
+                journeys_ = self.travel_request(cur_req)
+                if not journeys_:
+                    break
 
-            # 2) Keep only new results, and yield them sorted by departure date.
-            diff = set(journeys_).difference(journeys)
-            for journey in sorted(diff, key=lambda x: x.departure_date):
-                yield journey
+                # 2) Keep only new results, and yield them sorted by departure date.
+                diff = set(journeys_).difference(journeys)
+                for journey in sorted(diff, key=lambda x: x.departure_date):
+                    yield journey
 
             # 3) Store the results.
             journeys = journeys.union(journeys_)
@@ -61,9 +97,186 @@ class TravelClient:
         # p.464 "else Blocks Beyond If"
         else:
             logging.warning(
-                "More than %s pages found, results will be incomplete.", max_iter
+                "More than %s pages found, results will be incomplete.", self.max_iter
             )
 
+    def travel_request_iter_concurrent(
+        self, req: TravelRequest, windows: int = 6, max_workers: Optional[int] = None
+    ) -> Iterator[Journey]:
+        """
+        Concurrently fetch a full day, split in `windows` time windows.
+        Journeys are yielded sorted by departure date, as soon as the windows
+        up to their departure date are complete.
+        """
+        start = req.date.replace(hour=0, minute=0, second=0)
+        step = dt.timedelta(days=1) / windows
+        starts = [start + i * step for i in range(windows)]
+        # The last window is not bounded, as in `travel_request_iter`.
+        ends: List[Optional[dt.datetime]] = [*starts[1:], None]
+
+        executor = ThreadPoolExecutor(max_workers or windows)
+        stopped = threading.Event()
+        futures = [
+            executor.submit(self.__fetch_window, req, start_, end_, stopped)
+            for start_, end_ in zip(starts, ends)
+        ]
+        try:
+            for future in futures:
+                yield from sorted(future.result(), key=lambda x: x.departure_date)
+        finally:
+            # Do not fetch the remaining pages if the iteration is stopped early.
+            stopped.set()
+            for future in futures:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+    def __fetch_window(
+        self,
+        req: TravelRequest,
+        start: dt.datetime,
+        end: Optional[dt.datetime],
+        stopped: threading.Event,
+    ) -> List[Journey]:
+        """
+        Fetch the journeys departing between `start` and `end`.
+        """
+        # Journeys with the same key are the same journey,
+        # we keep the latest version from overlapping pages.
+        journeys: Dict[tuple, Journey] = {}
+        cur_dt = start
+
+        for _ in range(self.max_iter):
+            if stopped.is_set():
+                break
+            journeys_ = self.travel_request(attr.evolve(req, date=cur_dt))
+            if not journeys_:
+                break
+            journeys.update((x.key, x) for x in journeys_)
+
+            new_dt = max(x.departure_date for x in journeys_)
+            if (
+                (new_dt <= cur_dt)
+                or (end is not None and new_dt >= end)
+                or (new_dt.day > req.date.day)
+            ):
+                break
+            cur_dt = new_dt
+        else:
+            logging.warning(
+                "More than %s pages found in window starting at %s, "
+                "results will be incomplete.",
+                self.max_iter,
+                start,
+            )
+
+        # The windows do not overlap, so that a journey (which has a single
+        # departure date) is only returned by one window.
+        return [
+            x
+            for x in journeys.values()
+            if start <= x.departure_date and (end is None or x.departure_date < end)
+        ]
+
     def travel_request_full(self, req: TravelRequest) -> List[Journey]:
         "Batch fetch a full day."
         return list(self.travel_request_iter(req))
+
+    def travel_request_range(
+        self, req: TravelRequest, to_date: dt.datetime, max_workers: int = 4
+    ) -> Iterator[Journey]:
+        """
+        Fetch all the days from `req.date` to `to_date` (inclusive).
+        Days are fetched in parallel by up to `max_workers` threads,
+        and journeys are yielded in chronological order as soon as possible.
+        """
+        days = calendar_days(req.date, to_date)
+        executor = ThreadPoolExecutor(max_workers)
+        futures = [executor.submit(self.__fetch_day, req, day) for day in days]
+        try:
+            for future in futures:
+                yield from future.result()
+        finally:
+            # Do not fetch the remaining days if the iteration is stopped early.
+            for future in futures:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+    def __fetch_day(self, req: TravelRequest, day: dt.datetime) -> List[Journey]:
+        # The last page of a day can contain journeys from the next day,
+        # which are fetched with the next day.
+        journeys = self.travel_request_iter(attr.evolve(req, date=day))
+        return [x for x in journeys if x.departure_date.date() == day.date()]
+
+
+def calendar_days(date: dt.datetime, to_date: dt.datetime) -> List[dt.datetime]:
+    """
+    `date` and the following days, at the same time, until the calendar day
+    of `to_date` (inclusive), regardless of the time of `to_date`.
+    """
+    days = []
+    day = date
+    while day.date() <= to_date.date():
+        days.append(day)
+        day += dt.timedelta(days=1)
+    return days
+
+
+class AsyncBoardClient:
+    """
+    Asynchronous version of a `BoardClient`.
+
+    Requests are sent from a thread pool of `max_concurrency` threads,
+    through the pooled HTTP transport of the wrapped client.
+    """
+
+    def __init__(self, client: BoardClient, max_concurrency: int = 10) -> None:
+        self.client = client
+        self.executor = ThreadPoolExecutor(max_concurrency)
+
+    async def board_request(self, req: BoardRequest) -> List[BoardEntry]:
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(self.executor, self.client.board_request, req)
+
+    def close(self) -> None:
+        self.executor.shutdown()
+
+
+class AsyncTravelClient:
+    """
+    Asynchronous version of a `TravelClient`.
+
+    Requests are sent from a thread pool of `max_concurrency` threads,
+    through the pooled HTTP transport of the wrapped client.
+    """
+
+    def __init__(self, client: TravelClient, max_concurrency: int = 10) -> None:
+        self.client = client
+        self.executor = ThreadPoolExecutor(max_concurrency)
+
+    async def travel_request(self, req: TravelRequest) -> List[Journey]:
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(
+            self.executor, self.client.travel_request, req
+        )
+
+    async def travel_request_iter(
+        self, req: TravelRequest, stream: bool = False
+    ) -> AsyncIterator[Journey]:
+        "Iteratively fetch a full day."
+        loop = asyncio.get_event_loop()
+        it = self.client.travel_request_iter(req, stream=stream)
+        while True:
+            journey = await loop.run_in_executor(self.executor, next, it, None)
+            if journey is None:
+                break
+            yield journey
+
+    async def travel_request_full(self, req: TravelRequest) -> List[Journey]:
+        "Batch fetch a full day."
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(
+            self.executor, self.client.travel_request_full, req
+        )
+
+    def close(self) -> None:
+        self.executor.shutdown()
@@ -0,0 +1,120 @@
+"""
+Request coalescing (single-flight) for the API clients.
+
+Concurrent identical requests share a single upstream call,
+and all the callers receive its result (or its exception).
+"""
+
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, List, TypeVar, Union
+
+from ..models import BoardEntry, Journey
+from .client import AsyncBoardClient, AsyncTravelClient, BoardClient, TravelClient
+from .requests import BoardRequest, TravelRequest
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Thread-safe single-flight group.
+    """
+
+    def __init__(self) -> None:
+        self.calls: Dict[str, Future] = {}
+        self.lock = threading.Lock()
+        # Number of calls that were served by another in-flight call.
+        self.coalesced = 0
+
+    def do(self, key: str, fn: Callable[[], T]) -> T:
+        with self.lock:
+            future = self.calls.get(key)
+            if future is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                future = self.calls[key] = Future()
+                leader = True
+
+        if not leader:
+            return future.result()  # type: ignore
+
+        try:
+            future.set_result(fn())
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self.lock:
+                del self.calls[key]
+        return future.result()  # type: ignore
+
+
+class AsyncSingleFlight:
+    """
+    asyncio single-flight group, to be used from a single event loop.
+    """
+
+    def __init__(self) -> None:
+        self.calls: Dict[str, "asyncio.Future[Any]"] = {}
+        self.coalesced = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        future = self.calls.get(key)
+        if future is not None:
+            self.coalesced += 1
+        else:
+            future = self.calls[key] = asyncio.ensure_future(fn())
+            future.add_done_callback(lambda _: self.calls.pop(key, None))
+        # Do not cancel the shared call when one of the callers is cancelled.
+        return await asyncio.shield(future)
+
+
+class CoalescingClient(BoardClient, TravelClient):
+    """
+    Share a single upstream call between concurrent identical requests,
+    for clients used from several threads.
+    """
+
+    def __init__(self, client: Union[BoardClient, TravelClient]) -> None:
+        self.client = client
+        self.flight = SingleFlight()
+
+    def board_request(self, req: BoardRequest) -> List[BoardEntry]:
+        assert isinstance(self.client, BoardClient)
+        client = self.client
+        key = "board:" + client.board_request_key(req)
+        return self.flight.do(key, lambda: client.board_request(req))
+
+    def travel_request(self, req: TravelRequest) -> List[Journey]:
+        assert isinstance(self.client, TravelClient)
+        client = self.client
+        key = "travel:" + client.travel_request_key(req)
+        return self.flight.do(key, lambda: client.travel_request(req))
+
+
+class AsyncCoalescingClient:
+    """
+    Share a single upstream call between concurrent identical requests,
+    for asynchronous clients.
+    """
+
+    def __init__(self, client: Union[AsyncBoardClient, AsyncTravelClient]) -> None:
+        self.client = client
+        self.flight = AsyncSingleFlight()
+
+    async def board_request(self, req: BoardRequest) -> List[BoardEntry]:
+        assert isinstance(self.client, AsyncBoardClient)
+        client = self.client
+        key = "board:" + client.client.board_request_key(req)
+        return await self.flight.do(key, lambda: client.board_request(req))
+
+    async def travel_request(self, req: TravelRequest) -> List[Journey]:
+        assert isinstance(self.client, AsyncTravelClient)
+        client = self.client
+        key = "travel:" + client.client.travel_request_key(req)
+        return await self.flight.do(key, lambda: client.travel_request(req))
+
+    def close(self) -> None:
+        self.client.close()
@@ -1,14 +1,14 @@
 import datetime as dt
 import logging
-from typing import Any, List
+from typing import Any, Dict, List, Optional
 
 import pytz
-import requests
 
-from ..models import BoardEntry, Transport
+from ..models import BoardEntry, Station, Transport
 from ..stores import Stations
 from .client import BoardClient
 from .requests import BoardRequest
+from .transport import HTTPTransport
 
 
 class Client(BoardClient):
@@ -19,14 +19,16 @@ class Client(BoardClient):
     ENDPOINT = "https://www.garesetconnexions.sncf/fr/train-times"
     TZ = pytz.timezone("Europe/Paris")
 
-    def __init__(self, stations: Stations) -> None:
+    def __init__(
+        self, stations: Stations, transport: Optional[HTTPTransport] = None
+    ) -> None:
         self.logger = logging.getLogger(__name__)
         self.stations = stations
+        self.transport = transport or HTTPTransport()
 
     def request(self, tvs_id: str, type_: str) -> Any:
         url = f"{self.ENDPOINT}/{tvs_id}/{type_}"
-        # pylint: disable=no-member
-        res = requests.get(url, timeout=10)
+        res = self.transport.request("GET", url)
 
         self.logger.debug(res.request.headers)
         self.logger.debug(res.request.url)
@@ -41,10 +43,14 @@ class Client(BoardClient):
         return self.parse_response(res)
 
     def parse_response(self, res: dict) -> List[BoardEntry]:
-        return [self.__to_entry(x) for x in res["trains"]]
+        # Resolve all the stations at once.
+        stations = self.stations.find_many_or_create(
+            x["origdest"] for x in res["trains"]
+        )
+        return [self.__to_entry(x, stations) for x in res["trains"]]
 
-    def __to_entry(self, obj: dict) -> BoardEntry:
-        tofrom = self.stations.find_or_create(obj["origdest"])
+    def __to_entry(self, obj: dict, stations: Dict[str, Station]) -> BoardEntry:
+        tofrom = stations[obj["origdest"]]
         transport = Transport("", obj["type"], obj["num"], "")
         time = self.__parse_time(obj["heure"])
         delay = self.__parse_delay(obj["retard"])
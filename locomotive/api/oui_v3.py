@@ -1,16 +1,26 @@
 import datetime as dt
+import json
 import logging
 import re
-from typing import Any, List
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 
 import requests
 from money.currency import Currency
 from money.money import Money
 
-from ..models import Journey, Proposal, Segment, Transport
+from ..models import Journey, Proposal, Segment, Station, Transport
 from ..stores import Stations
 from .client import TravelClient
-from .requests import TravelRequest
+from .requests import TravelRequest, payload_key
+from .stream import iter_json_array
+from .transport import HTTPTransport
+
+try:
+    import orjson
+
+    loads: Callable[[bytes], Any] = orjson.loads
+except ImportError:  # pragma: no cover
+    loads = json.loads
 
 
 # TODO: Move somewhere else (in TravelRequest ?)
@@ -22,20 +32,107 @@ def strftime_sncf(date: dt.datetime) -> str:
     return s
 
 
+DATE_FORMAT = "%Y-%m-%dT%H:%M:%S.%f%z"
+TIMEZONES: Dict[str, dt.tzinfo] = {}
+CURRENCIES: Dict[str, Currency] = {}
+PRICES: Dict[Tuple[str, str], Money] = {}
+
+
+def strptime_sncf(s: str) -> dt.datetime:
+    """
+    Parse a date such as 2019-06-23T16:18:00.000+02:00,
+    as `strptime` would with `DATE_FORMAT`, but faster.
+    """
+    # Fast path: fixed-width fields, and a cached timezone per offset.
+    if (
+        len(s) == 29
+        and s[4] + s[7] + s[10] + s[13] + s[16] + s[19] + s[26] == "--T::.:"
+    ):
+        offset = s[23:]
+        tz = TIMEZONES.get(offset)
+        if tz is None:
+            tz = strptime_sncf_slow("2000-01-01T00:00:00.000" + offset).tzinfo
+            assert tz is not None
+            TIMEZONES[offset] = tz
+        return dt.datetime(
+            int(s[0:4]),
+            int(s[5:7]),
+            int(s[8:10]),
+            int(s[11:13]),
+            int(s[14:16]),
+            int(s[17:19]),
+            int(s[20:23]) * 1000,
+            tz,
+        )
+    return strptime_sncf_slow(s)
+
+
+def strptime_sncf_slow(s: str) -> dt.datetime:
+    # : separated TZ doesn't work with Python < 3.7
+    # 2019-06-23T16:18:00.000+02:00 -> 2019-06-23T16:18:00.000+0200
+    s = re.sub(r"([+-])(\d{2}):(\d{2})$", r"\g<1>\g<2>\g<3>", s)
+    return dt.datetime.strptime(s, DATE_FORMAT)
+
+
+def to_money(value: Any, currency: str) -> Money:
+    "Build a `Money` from an API price, with cached instances."
+    amount = str(value)
+    key = (amount, currency)
+    money = PRICES.get(key)
+    if money is None:
+        currency_ = CURRENCIES.get(currency)
+        if currency_ is None:
+            currency_ = CURRENCIES[currency] = Currency(currency)
+        money = Money(amount, currency_)
+        # Money objects are immutable, they can be shared between proposals.
+        if len(PRICES) < 2 ** 16:
+            PRICES[key] = money
+    return money
+
+
 class Client(TravelClient):
     """
     Client for the wshoraires.oui.sncf V3 API
     """
 
-    DATE_FORMAT = "%Y-%m-%dT%H:%M:%S.%f%z"
+    DATE_FORMAT = DATE_FORMAT
     ENDPOINT = "https://wshoraires.oui.sncf/m730/vmd/maq/v3/proposals/train"
     USER_AGENT = "OUI.sncf/73.2.0 CFNetwork/1125.2 Darwin/19.4.0"
+    STREAM_CHUNK_SIZE = 16 * 1024
 
-    def __init__(self, stations: Stations) -> None:
+    def __init__(
+        self, stations: Stations, transport: Optional[HTTPTransport] = None
+    ) -> None:
         self.logger = logging.getLogger(__name__)
         self.stations = stations
+        self.transport = transport or HTTPTransport()
 
     def request(self, json: dict) -> Any:
+        res = self.__post(json)
+        self.logger.debug(res.content)
+
+        if res.status_code == 404:
+            # {"code":"ERR-0102","label":"empty travel result"}
+            return {"journeys": []}
+
+        res.raise_for_status()
+        return loads(res.content)
+
+    def request_stream(self, json: dict) -> Iterator[dict]:
+        """
+        Send a request and yield the journeys of the response
+        as soon as they are received.
+        """
+        res = self.__post(json, stream=True)
+        with res:
+            if res.status_code == 404:
+                return
+            res.raise_for_status()
+            yield from iter_json_array(
+                res.iter_content(chunk_size=self.STREAM_CHUNK_SIZE), "journeys"
+            )
+
+    def __post(self, json: dict, stream: bool = False) -> requests.Response:
         headers = {
             "Accept": "application/json",
             "Accept-Language": "fr-FR",
@@ -52,22 +149,29 @@ class Client(TravelClient):
             "x-screen-density-qualifier": "xhdpi",
         }
 
-        # pylint: disable=no-member
-        res = requests.post(self.ENDPOINT, headers=headers, json=json, timeout=10)
+        res = self.transport.request(
+            "POST", self.ENDPOINT, headers=headers, json=json, stream=stream
+        )
 
         self.logger.debug(res.request.headers)
         self.logger.debug(res.request.url)
         self.logger.debug(res.request.body)
-        self.logger.debug(res.content)
+        return res
 
-        if res.status_code == 404:
-            # {"code":"ERR-0102","label":"empty travel result"}
-            return {"journeys": []}
+    def travel_request(self, req: TravelRequest) -> List[Journey]:
+        # TODO: Handle cancelled, full trains (no price ?)
+        # TODO: Show class in formatter
+        res = self.request(self.travel_payload(req))
+        return self.parse_response(res)
 
-        res.raise_for_status()
-        return res.json()
+    def travel_request_stream(self, req: TravelRequest) -> Iterator[Journey]:
+        for obj in self.request_stream(self.travel_payload(req)):
+            yield self.parse_journey(obj)
 
-    def travel_request(self, req: TravelRequest) -> List[Journey]:
+    def travel_request_key(self, req: TravelRequest) -> str:
+        return payload_key(self.travel_payload(req))
+
+    def travel_payload(self, req: TravelRequest) -> dict:
         passengers_dict = []
         for passenger in req.passengers:
             commercial_card = {"type": "NO_CARD"}
@@ -98,29 +202,34 @@ class Client(TravelClient):
             "travelClass": req.travel_class.upper(),
         }
 
-        # TODO: Handle cancelled, full trains (no price ?)
-        # TODO: Show class in formatter
-        res = self.request(sncf_dict)
-        return self.parse_response(res)
+        return sncf_dict
 
     def parse_response(self, res: dict) -> List[Journey]:
-        return [self.__to_journey(x) for x in res["journeys"]]
+        # Resolve all the stations at once.
+        stations = self.stations.find_many_or_raise(
+            segment[key]["info"]["miInfo"]["code"]
+            for journey in res["journeys"]
+            for segment in journey["segments"]
+            for key in ("departureStation", "arrivalStation")
+        )
+        return [self.__to_journey(x, stations) for x in res["journeys"]]
+
+    def parse_journey(self, obj: dict) -> Journey:
+        "Parse a single journey of a response."
+        stations = self.stations.find_many_or_raise(
+            segment[key]["info"]["miInfo"]["code"]
+            for segment in obj["segments"]
+            for key in ("departureStation", "arrivalStation")
+        )
+        return self.__to_journey(obj, stations)
 
-    def __to_journey(self, obj: dict) -> Journey:
+    def __to_journey(self, obj: dict, stations: Dict[str, Station]) -> Journey:
         return Journey(
-            segments=tuple(map(self.__to_segment, obj["segments"])),
+            segments=tuple(self.__to_segment(x, stations) for x in obj["segments"]),
             proposals=tuple(map(self.__to_proposal, obj["proposals"])),
         )
 
-    def __to_segment(self, obj: dict) -> Segment:
-        # : separated TZ doesn't work with Python < 3.7
-        # 2019-06-23T16:18:00.000+02:00 -> 2019-06-23T16:18:00.000+0200
-        departure_date_str = re.sub(
-            r"([+-])(\d{2}):(\d{2})$", r"\g<1>\g<2>\g<3>", obj["departureDate"]
-        )
-        arrival_date_str = re.sub(
-            r"([+-])(\d{2}):(\d{2})$", r"\g<1>\g<2>\g<3>", obj["arrivalDate"]
-        )
+    def __to_segment(self, obj: dict, stations: Dict[str, Station]) -> Segment:
         transport = Transport(
             equipment=obj["transport"]["equipment"],
             label=obj["transport"]["label"],
@@ -129,18 +238,16 @@ class Client(TravelClient):
         )
         return Segment(
             transport=transport,
-            departure_station=self.stations.find_or_raise(
+            departure_station=stations[
                 obj["departureStation"]["info"]["miInfo"]["code"]
-            ),
-            arrival_station=self.stations.find_or_raise(
-                obj["arrivalStation"]["info"]["miInfo"]["code"]
-            ),
-            departure_date=dt.datetime.strptime(departure_date_str, self.DATE_FORMAT),
-            arrival_date=dt.datetime.strptime(arrival_date_str, self.DATE_FORMAT),
+            ],
+            arrival_station=stations[obj["arrivalStation"]["info"]["miInfo"]["code"]],
+            departure_date=strptime_sncf(obj["departureDate"]),
+            arrival_date=strptime_sncf(obj["arrivalDate"]),
         )
 
     def __to_proposal(self, obj: dict) -> Proposal:
         return Proposal(
             flexibility_level=obj["flexibility"],
-            price=Money(str(obj["price"]["value"]), Currency(obj["price"]["currency"])),
+            price=to_money(obj["price"]["value"], obj["price"]["currency"]),
         )
@@ -0,0 +1,84 @@
+"""
+Rate and concurrency limits for the API clients.
+"""
+
+import threading
+import time
+from typing import Any, Callable, Optional
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket, allowing `rate` requests per second
+    on average, with bursts of up to `burst` requests.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], Any] = time.sleep,
+    ) -> None:
+        if rate <= 0:
+            raise ValueError("`rate` must be positive")
+        self.rate = rate
+        self.burst = max(burst or rate, 1)
+        self.clock = clock
+        self.sleep = sleep
+        self.tokens = self.burst
+        self.updated = clock()
+        self.lock = threading.Lock()
+
+    def try_acquire(self, tokens: float = 1) -> float:
+        """
+        Take `tokens` from the bucket if they are available and return 0,
+        otherwise return the number of seconds to wait before retrying.
+        """
+        with self.lock:
+            now = self.clock()
+            self.tokens = min(
+                self.burst, self.tokens + (now - self.updated) * self.rate
+            )
+            self.updated = now
+            if self.tokens >= tokens:
+                self.tokens -= tokens
+                return 0
+            return (tokens - self.tokens) / self.rate
+
+    def acquire(self, tokens: float = 1) -> None:
+        "Wait until `tokens` are available and take them."
+        while True:
+            delay = self.try_acquire(tokens)
+            if not delay:
+                return
+            self.sleep(delay)
+
+
+class Limiter:
+    """
+    Limit the concurrency and/or the rate of the calls made in `with limiter:`.
+    """
+
+    def __init__(
+        self, concurrency: Optional[int] = None, rate: Optional[float] = None
+    ) -> None:
+        self.semaphore = (
+            threading.BoundedSemaphore(concurrency) if concurrency else None
+        )
+        self.bucket = TokenBucket(rate) if rate else None
+
+    def __enter__(self) -> "Limiter":
+        if self.semaphore:
+            self.semaphore.acquire()
+        if self.bucket:
+            try:
+                self.bucket.acquire()
+            except BaseException:
+                self.__exit__()
+                raise
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        if self.semaphore:
+            self.semaphore.release()
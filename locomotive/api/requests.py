@@ -1,5 +1,7 @@
 import datetime as dt
-from typing import List
+import hashlib
+import json
+from typing import Any, List
 
 import attr
 
@@ -20,3 +22,19 @@ class TravelRequest:
     passengers: List[Passenger] = attr.ib()
     date: dt.datetime = attr.ib()
     travel_class: str = attr.ib()
+
+
+def payload_key(payload: Any) -> str:
+    """
+    Canonical hash of a JSON-serializable request payload.
+    Objects that are not JSON-serializable are hashed by their `str()`.
+    """
+    data = json.dumps(payload, default=str, separators=(",", ":"), sort_keys=True)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+def request_key(req: Any) -> str:
+    """
+    Canonical hash of a `BoardRequest` or `TravelRequest`.
+    """
+    return payload_key([type(req).__name__, attr.asdict(req)])
@@ -0,0 +1,236 @@
+"""
+Request scheduling shared by the API clients: rate limiting, retries,
+and adaptive concurrency, per endpoint (host).
+"""
+
+import email.utils
+import logging
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+from urllib.parse import urlsplit
+
+import attr
+import requests
+
+from .ratelimit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = frozenset([429, 500, 502, 503, 504])
+
+
+@attr.s(frozen=True)
+class RetryPolicy:
+    "Exponential backoff with full jitter."
+    max_retries: int = attr.ib(default=3)
+    backoff: float = attr.ib(default=0.5)
+    max_backoff: float = attr.ib(default=30)
+    statuses: frozenset = attr.ib(default=RETRY_STATUSES)
+
+    def delay(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+
+@attr.s(slots=True)
+class EndpointMetrics:
+    requests: int = attr.ib(default=0)
+    successes: int = attr.ib(default=0)
+    failures: int = attr.ib(default=0)
+    retries: int = attr.ib(default=0)
+    throttled: int = attr.ib(default=0)
+    in_flight: int = attr.ib(default=0)
+    limit: float = attr.ib(default=0)
+    # Exponentially weighted moving average of the latency, in seconds.
+    latency: float = attr.ib(default=0)
+
+
+class AdaptiveLimiter:
+    """
+    Concurrency limit adjusted by additive-increase/multiplicative-decrease:
+    the limit grows by 1 every `limit` successful requests,
+    and is halved on errors, throttling, or latencies above `target_latency`.
+    """
+
+    def __init__(
+        self,
+        initial: int = 4,
+        minimum: int = 1,
+        maximum: int = 32,
+        target_latency: Optional[float] = None,
+    ) -> None:
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.target_latency = target_latency
+        self.in_flight = 0
+        self.condition = threading.Condition()
+
+    def acquire(self) -> None:
+        with self.condition:
+            while self.in_flight >= int(self.limit):
+                self.condition.wait()
+            self.in_flight += 1
+
+    def release(self, ok: bool, latency: float) -> None:
+        with self.condition:
+            self.in_flight -= 1
+            slow = self.target_latency is not None and latency > self.target_latency
+            if ok and not slow:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            else:
+                self.limit = max(self.minimum, self.limit / 2)
+            self.condition.notify_all()
+
+
+class Endpoint:
+    def __init__(self, bucket: Optional[TokenBucket], limiter: AdaptiveLimiter) -> None:
+        self.bucket = bucket
+        self.limiter = limiter
+        self.metrics = EndpointMetrics(limit=limiter.limit)
+        self.lock = threading.Lock()
+
+
+class Scheduler:
+    """
+    Schedule the requests sent through an `HTTPTransport`.
+
+    For each endpoint (host), requests are rate limited by a token bucket
+    (`rate` requests per second, if set), their concurrency is capped
+    by an `AdaptiveLimiter`, and failed requests (connection errors, timeouts,
+    and `retry.statuses`) are retried with backoff, honoring `Retry-After`.
+    Responses asking to retry after more than `retry.max_backoff` seconds
+    are returned without retrying.
+    """
+
+    def __init__(
+        self,
+        rate: Optional[float] = None,
+        burst: Optional[float] = None,
+        retry: RetryPolicy = RetryPolicy(),
+        initial_concurrency: int = 4,
+        max_concurrency: int = 32,
+        target_latency: Optional[float] = None,
+        sleep: Callable[[float], Any] = time.sleep,
+    ) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.retry = retry
+        self.initial_concurrency = initial_concurrency
+        self.max_concurrency = max_concurrency
+        self.target_latency = target_latency
+        self.sleep = sleep
+        self.endpoints: Dict[str, Endpoint] = {}
+        self.lock = threading.Lock()
+
+    def metrics(self) -> Dict[str, EndpointMetrics]:
+        "Snapshot of the metrics of each endpoint."
+        with self.lock:
+            endpoints = dict(self.endpoints)
+        metrics = {}
+        for name, endpoint in endpoints.items():
+            with endpoint.lock:
+                metrics[name] = attr.evolve(endpoint.metrics)
+        return metrics
+
+    def endpoint(self, url: str) -> Endpoint:
+        name = urlsplit(url).netloc
+        with self.lock:
+            if name not in self.endpoints:
+                bucket = TokenBucket(self.rate, self.burst) if self.rate else None
+                limiter = AdaptiveLimiter(
+                    self.initial_concurrency,
+                    maximum=self.max_concurrency,
+                    target_latency=self.target_latency,
+                )
+                self.endpoints[name] = Endpoint(bucket, limiter)
+            return self.endpoints[name]
+
+    def execute(
+        self, url: str, send: Callable[[], requests.Response]
+    ) -> requests.Response:
+        "Send a request to `url` with `send()`, retrying it if needed."
+        endpoint = self.endpoint(url)
+        attempt = 0
+        while True:
+            delay = None
+            try:
+                res = self.__send(endpoint, send)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt >= self.retry.max_retries:
+                    raise
+            else:
+                if res.status_code not in self.retry.statuses:
+                    return res
+                if attempt >= self.retry.max_retries:
+                    return res
+                delay = retry_after(res.headers.get("Retry-After"))
+                if delay is not None and delay > self.retry.max_backoff:
+                    # Do not block the calling thread for that long,
+                    # retrying earlier would be throttled again.
+                    return res
+                res.close()
+
+            if delay is None:
+                delay = self.retry.delay(attempt)
+            with endpoint.lock:
+                endpoint.metrics.retries += 1
+            logger.info("Retrying request to %s in %.2fs", url, delay)
+            self.sleep(delay)
+            attempt += 1
+
+    def __send(
+        self, endpoint: Endpoint, send: Callable[[], requests.Response]
+    ) -> requests.Response:
+        if endpoint.bucket:
+            endpoint.bucket.acquire()
+        endpoint.limiter.acquire()
+        with endpoint.lock:
+            endpoint.metrics.requests += 1
+            endpoint.metrics.in_flight += 1
+
+        ok = False
+        res: Optional[requests.Response] = None
+        start = time.monotonic()
+        try:
+            res = send()
+            ok = res.status_code < 500 and res.status_code != 429
+            return res
+        finally:
+            latency = time.monotonic() - start
+            endpoint.limiter.release(ok, latency)
+            with endpoint.lock:
+                metrics = endpoint.metrics
+                metrics.in_flight -= 1
+                metrics.limit = endpoint.limiter.limit
+                metrics.latency = (
+                    latency
+                    if metrics.requests == 1
+                    else 0.8 * metrics.latency + 0.2 * latency
+                )
+                if ok:
+                    metrics.successes += 1
+                else:
+                    metrics.failures += 1
+                if res is not None and res.status_code == 429:
+                    metrics.throttled += 1
+
+
+default_scheduler = Scheduler()
+"Scheduler shared by the transports created without an explicit scheduler."
+
+
+def retry_after(value: Optional[str]) -> Optional[float]:
+    "Parse a `Retry-After` header value, in seconds or as an HTTP date."
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        date = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, date.timestamp() - time.time())
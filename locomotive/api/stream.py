@@ -0,0 +1,102 @@
+"""
+Incremental parsing of JSON responses.
+"""
+
+import codecs
+import json
+from typing import Any, Iterable, Iterator
+
+WHITESPACE = " \t\n\r"
+
+
+class JSONArrayStream:
+    """
+    Yield the elements of the `key` array of a top-level JSON object,
+    as soon as they are received.
+
+    Other values of the object are skipped, and the end of the document
+    (after the array) is not read.
+    """
+
+    def __init__(self, chunks: Iterable[bytes], key: str) -> None:
+        self.chunks = iter(chunks)
+        self.key = key
+        self.decoder = json.JSONDecoder()
+        self.utf8 = codecs.getincrementaldecoder("utf-8")()
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def __iter__(self) -> Iterator[Any]:
+        self.expect("{")
+        while True:
+            if self.peek() == "}":
+                return
+            key = self.value()
+            self.expect(":")
+            if key == self.key:
+                break
+            self.value()
+            if self.peek() == ",":
+                self.pos += 1
+
+        self.expect("[")
+        if self.peek() == "]":
+            return
+        while True:
+            yield self.value()
+            if self.peek() == "]":
+                return
+            self.expect(",")
+
+    def fill(self) -> bool:
+        "Read the next chunk, return False at the end of the stream."
+        if self.eof:
+            return False
+        # Drop the parsed data, to keep the buffer small.
+        self.buffer = self.buffer[self.pos :]
+        self.pos = 0
+        chunk = next(self.chunks, None)
+        if chunk is None:
+            self.eof = True
+            self.buffer += self.utf8.decode(b"", final=True)
+        else:
+            self.buffer += self.utf8.decode(chunk)
+        return True
+
+    def peek(self) -> str:
+        "Return the next non-whitespace character."
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.fill():
+                raise ValueError("Unexpected end of JSON stream")
+
+    def expect(self, char: str) -> None:
+        c = self.peek()
+        if c != char:
+            raise ValueError("Expected {!r} in JSON stream, got {!r}".format(char, c))
+        self.pos += 1
+
+    def value(self) -> Any:
+        "Decode the next JSON value."
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if not self.fill():
+                    raise
+                continue
+            # A number at the end of the buffer may be truncated.
+            if end == len(self.buffer) and self.fill():
+                continue
+            self.pos = end
+            return value
+
+
+def iter_json_array(chunks: Iterable[bytes], key: str) -> Iterator[Any]:
+    "See `JSONArrayStream`."
+    return iter(JSONArrayStream(chunks, key))
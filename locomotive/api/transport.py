@@ -0,0 +1,55 @@
+"""
+HTTP transport shared by the API clients.
+"""
+
+from http.cookiejar import DefaultCookiePolicy
+from typing import Any, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .scheduler import Scheduler, default_scheduler
+
+
+class HTTPTransport:
+    """
+    A pooled HTTP transport, built on a `requests.Session`.
+
+    Connections are kept alive and reused between requests,
+    and a transport can be shared by several clients and threads.
+    `pool_size` should be at least the number of concurrent requests.
+
+    Requests are rate limited and retried by the `scheduler`,
+    by default shared by all the transports.
+    """
+
+    def __init__(
+        self,
+        pool_size: int = 10,
+        timeout: float = 10,
+        scheduler: Optional[Scheduler] = None,
+    ) -> None:
+        self.timeout = timeout
+        self.scheduler = scheduler or default_scheduler
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        # Do not store cookies between requests,
+        # to keep the same behavior as `requests.get/post`.
+        self.session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+
+    def request(self, method: str, url: str, **kwargs: Any) -> requests.Response:
+        kwargs.setdefault("timeout", self.timeout)
+        return self.scheduler.execute(
+            url, lambda: self.session.request(method, url, **kwargs)
+        )
+
+    def close(self) -> None:
+        self.session.close()
+
+    def __enter__(self) -> "HTTPTransport":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
@@ -0,0 +1,78 @@
+"""
+In-memory caches shared between locomotive modules.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+import attr
+
+MISSING = object()
+"Sentinel returned by `LRUCache.get` when a key is not cached."
+
+
+@attr.s(slots=True)
+class CacheStats:
+    hits: int = attr.ib(default=0)
+    misses: int = attr.ib(default=0)
+    evictions: int = attr.ib(default=0)
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class LRUCache:
+    """
+    A bounded, thread-safe, least-recently-used cache.
+    """
+
+    def __init__(self, maxsize: int = 1024) -> None:
+        if maxsize <= 0:
+            raise ValueError("`maxsize` must be positive")
+        self.maxsize = maxsize
+        self.stats = CacheStats()
+        self.entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.entries
+
+    def get(self, key: Hashable, default: Any = MISSING) -> Any:
+        with self.lock:
+            try:
+                value = self.entries[key]
+            except KeyError:
+                self.stats.misses += 1
+                return default
+            self.entries.move_to_end(key)
+            self.stats.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+                self.stats.evictions += 1
+
+    def get_or_put(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """
+        Return the cached value for `key`, or compute and cache it with `fn()`.
+        `fn` is called outside of the lock and may run concurrently for the same key.
+        """
+        value = self.get(key)
+        if value is MISSING:
+            value = fn()
+            self.put(key, value)
+        return value
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
@@ -1,14 +1,17 @@
 import datetime as dt
-from typing import Any, Union
+import sys
+from typing import Any, Dict, Iterable, Union
 
 import click
 from requests.exceptions import HTTPError  # pylint: disable=no-name-in-module
 
+from ...analytics import track_cheapest_per_day
+from ...api.client import calendar_days
 from ...api.oui_v3 import Client
 from ...api.requests import TravelRequest
-from ...models import Passenger
+from ...models import Journey, Passenger
 from ..ext import DateParseParamType
-from ..formatters import JSONFormatter, PrettyFormatter
+from ..formatters import JSONFormatter, JSONLinesFormatter, PrettyFormatter
 
 
 @click.command()
@@ -21,6 +24,23 @@ from ..formatters import JSONFormatter, PrettyFormatter
     show_default=True,
     help="Date (e.g 2019-06-01, 1st of June, 1er Juin ...), France timezone.",
 )
+@click.option(
+    "--from-date",
+    type=DateParseParamType(),
+    help="First date of a date range search (replaces --date).",
+)
+@click.option(
+    "--to-date",
+    type=DateParseParamType(),
+    help="Last date (inclusive) of a date range search.",
+)
+@click.option(
+    "--workers",
+    type=click.IntRange(min=1),
+    default=4,
+    show_default=True,
+    help="Number of days fetched in parallel for a date range search.",
+)
 @click.option(
     "--class",
     "travel_class",
@@ -31,7 +51,7 @@ from ..formatters import JSONFormatter, PrettyFormatter
 )
 @click.option(
     "--format",
-    type=click.Choice(["pretty", "json"]),
+    type=click.Choice(["pretty", "json", "jsonl"]),
     default="pretty",
     show_default=True,
     help="Output format.",
@@ -49,13 +69,18 @@ def search(ctx: click.Context, **args: Any) -> None:
     Examples:
     locomotive search Brest Paris
     locomotive search Brest Paris --class second --date 2019-06-01
+    locomotive search Brest Paris --from-date 2019-06-01 --to-date 2019-06-30
+    locomotive search Brest Paris --format jsonl | jq .proposals
     """
     stations = ctx.obj["stations"]
     client = Client(stations)
 
-    date: dt.datetime = args["date"]
+    date: dt.datetime = args["from_date"] or args["date"]
     if date is None:
         raise click.UsageError("Cannot parse date.")
+    to_date: dt.datetime = args["to_date"] or date
+    if to_date.date() < date.date():
+        raise click.UsageError("--to-date must not be before --from-date.")
     # TODO: date.start_of("day")
 
     # Hack: if set to 0 (midnight), the API
@@ -67,21 +92,27 @@ def search(ctx: click.Context, **args: Any) -> None:
     arrival_station = stations.find_or_raise(args["destination"])
     passenger = Passenger.dummy()
 
+    days = calendar_days(date, to_date)
     click.echo(
         "{} → {} ({:.0f}km) on {}".format(
             departure_station.name,
             arrival_station.name,
             departure_station.distance_to(arrival_station),
             date.strftime("%b %d %Y at %H:%M"),
-        ),
+        )
+        + (" to {}".format(days[-1].strftime("%b %d %Y")) if len(days) > 1 else ""),
         err=True,
     )
 
     click.echo("{} ({} years old)\n".format(passenger.name, passenger.age), err=True)
 
-    formatter: Union[PrettyFormatter, JSONFormatter] = PrettyFormatter()
+    formatter: Union[PrettyFormatter, JSONFormatter, JSONLinesFormatter]
+    # Journeys are printed one at a time to a terminal, and buffered otherwise.
+    formatter = PrettyFormatter(buffer_size=0 if sys.stdout.isatty() else 2 ** 16)
     if args["format"] == "json":
         formatter = JSONFormatter()
+    elif args["format"] == "jsonl":
+        formatter = JSONLinesFormatter()
 
     try:
         req = TravelRequest(
@@ -91,8 +122,32 @@ def search(ctx: click.Context, **args: Any) -> None:
             date=date,
             travel_class=args["travel_class"],
         )
-        it = client.travel_request_iter(req)
-        formatter.print(it, fn=click.echo)
+        if len(days) == 1:
+            formatter.print(client.travel_request_iter(req, stream=True), fn=click.echo)
+            return
+        cheapest: Dict[dt.date, Journey] = {}
+        it = client.travel_request_range(req, to_date, max_workers=args["workers"])
+        formatter.print(track_cheapest_per_day(it, cheapest), fn=click.echo)
+        print_cheapest(days, cheapest)
     except HTTPError as exception:
         click.echo(exception.response.content, err=True)
         raise exception
+
+
+def print_cheapest(
+    days: Iterable[dt.datetime], cheapest: Dict[dt.date, Journey]
+) -> None:
+    click.echo("\nCheapest per day:", err=True)
+    for day in days:
+        journey = cheapest.get(day.date())
+        if journey is None:
+            click.echo("{}  -".format(day.strftime("%a %b %d %Y")), err=True)
+            continue
+        click.echo(
+            "{}  {}  {}".format(
+                day.strftime("%a %b %d %Y"),
+                journey.departure_date.strftime("%H:%M"),
+                journey.lowest_price,
+            ),
+            err=True,
+        )
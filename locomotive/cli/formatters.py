@@ -1,14 +1,15 @@
 import datetime as dt
+import functools
 import json
 from pathlib import Path
-from typing import Any, Callable, Iterable, Union
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
 
 import attr
 import babel.dates
-from jinja2 import Environment, FileSystemLoader
+from jinja2 import Environment, FileSystemLoader, Template
 from money.money import Money
 
-from ..models import Journey
+from ..models import Journey, Proposal
 
 
 class JSONFormatter:
@@ -19,7 +20,8 @@ class JSONFormatter:
     @staticmethod
     def serialize(obj: Any) -> Union[dict, str]:
         if hasattr(obj, "__attrs_attrs__"):
-            return attr.asdict(obj)
+            # Skip derived attributes, such as `Journey.key`.
+            return attr.asdict(obj, filter=lambda a, _: a.init)
         if isinstance(obj, dt.datetime):
             return obj.isoformat()
         if isinstance(obj, Money):
@@ -30,18 +32,107 @@ class JSONFormatter:
         fn(json.dumps(list(journeys), default=self.serialize, indent=4))
 
 
+class JSONLinesFormatter:
+    """
+    JSON Lines output: one compact JSON object per journey, with the same
+    structure as `JSONFormatter`, written as soon as the journey is received.
+    """
+
+    # Bound of the number of cached stations, transports and proposals.
+    max_fragments = 10000
+
+    def __init__(self) -> None:
+        self.encode = json.JSONEncoder(separators=(",", ":")).encode
+        # JSON of the objects shared by many journeys.
+        self.fragments: Dict[Any, str] = {}
+
+    def fragment(self, obj: Any) -> str:
+        "JSON of a station, transport or proposal."
+        fragment = self.fragments.get(obj)
+        if fragment is None:
+            if len(self.fragments) >= self.max_fragments:
+                self.fragments.clear()
+            if isinstance(obj, Proposal):
+                price = obj.price
+                fragment = '{{"flexibility_level":{},"price":{}}}'.format(
+                    self.encode(obj.flexibility_level),
+                    self.encode(
+                        {"amount": float(price.amount), "currency": price.currency.name}
+                        if isinstance(price, Money)
+                        else price
+                    ),
+                )
+            else:
+                fragment = self.encode(attr.asdict(obj))
+            self.fragments[obj] = fragment
+        return fragment
+
+    def serialize(self, journey: Journey) -> str:
+        fragment = self.fragment
+        segments = [
+            '{{"transport":{},"departure_station":{},"arrival_station":{},'
+            '"departure_date":"{}","arrival_date":"{}"}}'.format(
+                fragment(x.transport),
+                fragment(x.departure_station),
+                fragment(x.arrival_station),
+                x.departure_date.isoformat(),
+                x.arrival_date.isoformat(),
+            )
+            for x in journey.segments
+        ]
+        proposals = [fragment(x) for x in journey.proposals]
+        return '{{"segments":[{}],"proposals":[{}]}}'.format(
+            ",".join(segments), ",".join(proposals)
+        )
+
+    def print(self, journeys: Iterable[Journey], fn: Callable = print) -> None:
+        for journey in journeys:
+            fn(self.serialize(journey))
+
+
+# Dates are repeated across journeys, and formatting them with babel is slow.
+# The UTC offset is part of the key, as aware dates with different offsets
+# are equal if they are the same instant, but have different wall times.
+@functools.lru_cache(maxsize=4096)
+def format_date(
+    fn: Callable, pattern: str, x: dt.datetime, utcoffset: Optional[dt.timedelta]
+) -> str:
+    return str(fn(x, pattern))
+
+
+class TerminalLoader(FileSystemLoader):
+    """
+    Templates loader replacing the `<b>` tags with terminal escape codes,
+    once when the templates are loaded instead of after each rendering.
+    """
+
+    def get_source(self, environment: Environment, template: str) -> Tuple[Any, ...]:
+        source, filename, uptodate = super().get_source(environment, template)
+        source = source.replace("<b>", "\033[1m").replace("</b>", "\033[0m")
+        return source, filename, uptodate
+
+
 class PrettyFormatter:
     """
     Human-readable pretty-printed output.
+
+    Each journey is printed as soon as it is received, unless a
+    `buffer_size` is set, in which case the journeys are printed
+    by chunks of about `buffer_size` characters.
     """
 
+    def __init__(self, buffer_size: int = 0) -> None:
+        self.buffer_size = buffer_size
+
     @staticmethod
     def format_datetime(x: dt.datetime) -> str:
-        return str(babel.dates.format_datetime(x, "dd/MM/YYYY HH'h'mm"))
+        return format_date(
+            babel.dates.format_datetime, "dd/MM/YYYY HH'h'mm", x, x.utcoffset()
+        )
 
     @staticmethod
     def format_time(x: dt.datetime) -> str:
-        return str(babel.dates.format_time(x, "HH'h'mm"))
+        return format_date(babel.dates.format_time, "HH'h'mm", x, x.utcoffset())
 
     @staticmethod
     def format_timedelta(x: dt.timedelta) -> str:
@@ -50,20 +141,33 @@ class PrettyFormatter:
         minutes, _ = divmod(remainder, 60)
         return "{:02}h{:02}m".format(int(hours), int(minutes))
 
-    def print(self, journeys: Iterable[Journey], fn: Callable = print) -> None:
-        templates = Path(__file__).parent.joinpath("templates")
+    @classmethod
+    @functools.lru_cache(maxsize=None)
+    def template(cls) -> Template:
+        "The journey template, compiled once per process."
         env = Environment(
-            loader=FileSystemLoader(str(templates)),
+            loader=TerminalLoader(str(Path(__file__).parent.joinpath("templates"))),
             trim_blocks=True,
             lstrip_blocks=True,
         )
-        env.filters["format_time"] = self.format_time
-        env.filters["format_timedelta"] = self.format_timedelta
-        env.filters["format_datetime"] = self.format_datetime
+        env.filters["format_time"] = cls.format_time
+        env.filters["format_timedelta"] = cls.format_timedelta
+        env.filters["format_datetime"] = cls.format_datetime
+        return env.get_template("journey.txt")
 
+    def print(self, journeys: Iterable[Journey], fn: Callable = print) -> None:
+        render = self.template().render
+        buffer: List[str] = []
+        size = 0
         for journey in journeys:
-            template = env.get_template("journey.txt")
-            out = template.render(journey=journey)
-            out = out.replace("<b>", "\033[1m")
-            out = out.replace("</b>", "\033[0m")
-            fn(out)
+            out = render(journey=journey)
+            if not self.buffer_size:
+                fn(out)
+                continue
+            buffer.append(out)
+            size += len(out)
+            if size >= self.buffer_size:
+                fn("\n".join(buffer))
+                buffer, size = [], 0
+        if buffer:
+            fn("\n".join(buffer))
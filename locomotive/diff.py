@@ -1,10 +1,12 @@
+import datetime as dt
 from collections import defaultdict
 from enum import Enum, auto
-from typing import Dict, List, Optional, Tuple
+from itertools import groupby
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
 from money.money import Money
 
-from .models import Journey, Segment
+from .models import Journey
 
 
 class JourneyDiffType(Enum):
@@ -62,19 +64,28 @@ class JourneyDiff:
         return None
 
 
+def unchanged(old: Journey, new: Journey) -> bool:
+    "True if the diff of `old` and `new` is `NoChange`."
+    old_price, new_price = old.lowest_price, new.lowest_price
+    if old_price and new_price:
+        return bool(old_price == new_price)
+    return not old_price and not new_price
+
+
 def journeys_diff(
     old_journeys: List[Journey], new_journeys: List[Journey]
 ) -> List[JourneyDiff]:
     # We don't use sets here since we don't want to consider the same journey
     # with different prices, as different journeys.
-    # We consider that two journeys are the same, if all their segments are identical.
-    journeys: Dict[Tuple[Segment, ...], Dict[str, Journey]] = defaultdict(dict)
+    # We consider that two journeys are the same, if they have the same key
+    # (same trains, stations and departure dates).
+    journeys: Dict[tuple, Dict[str, Journey]] = defaultdict(dict)
 
     for journey in old_journeys:
-        journeys[journey.segments]["old"] = journey
+        journeys[journey.key]["old"] = journey
 
     for journey in new_journeys:
-        journeys[journey.segments]["new"] = journey
+        journeys[journey.key]["new"] = journey
 
     diffs = []
     for v in journeys.values():
@@ -82,3 +93,56 @@ def journeys_diff(
         diffs.append(diff)
 
     return diffs
+
+
+def departure_groups(
+    journeys: Iterable[Journey],
+) -> Iterator[Tuple[dt.datetime, Dict[tuple, Journey]]]:
+    "Group consecutive journeys with the same departure date, by key."
+    last: Optional[dt.datetime] = None
+    for date, group in groupby(journeys, key=lambda x: x.departure_date):
+        if last is not None and date < last:
+            raise ValueError("Journeys are not sorted by departure date")
+        last = date
+        yield date, {x.key: x for x in group}
+
+
+def iter_journeys_diff(
+    old_journeys: Iterable[Journey],
+    new_journeys: Iterable[Journey],
+    changes_only: bool = False,
+) -> Iterator[JourneyDiff]:
+    """
+    Same as `journeys_diff`, for journeys sorted by departure date,
+    such as the journeys yielded by `TravelClient.travel_request_iter`.
+
+    The diffs are yielded in departure order, and only the journeys
+    departing at the same date are held in memory.
+    With `changes_only`, the `NoChange` diffs are skipped.
+    """
+    old_groups = departure_groups(old_journeys)
+    new_groups = departure_groups(new_journeys)
+    old = next(old_groups, None)
+    new = next(new_groups, None)
+
+    while old is not None or new is not None:
+        if new is None or (old is not None and old[0] < new[0]):
+            assert old is not None
+            for journey in old[1].values():
+                yield JourneyDiff(journey, None)
+            old = next(old_groups, None)
+        elif old is None or new[0] < old[0]:
+            for journey in new[1].values():
+                yield JourneyDiff(None, journey)
+            new = next(new_groups, None)
+        else:
+            olds = old[1]
+            for key, journey in new[1].items():
+                previous = olds.pop(key, None)
+                if previous and changes_only and unchanged(previous, journey):
+                    continue
+                yield JourneyDiff(previous, journey)
+            for journey in olds.values():
+                yield JourneyDiff(journey, None)
+            old = next(old_groups, None)
+            new = next(new_groups, None)
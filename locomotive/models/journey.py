@@ -10,6 +10,15 @@ from money.money import Money
 
 from .station import Station
 
+EPOCH = dt.datetime(1970, 1, 1)
+
+
+def timestamp(date: dt.datetime) -> int:
+    "POSIX timestamp of aware dates, or seconds since 1970-01-01 for naive dates."
+    if date.tzinfo is None:
+        return (date - EPOCH) // dt.timedelta(seconds=1)
+    return int(date.timestamp())
+
 
 @attr.s(frozen=True, slots=True)
 class Transport:
@@ -90,12 +99,43 @@ class Journey:
     # We use tuples to guaranteed immutability
     # and make Journey hashable.
 
-    segments: Tuple[Segment, ...] = attr.ib()
+    segments: Tuple[Segment, ...] = attr.ib(hash=False)
     """Journey segments, from departure to arrival."""
 
-    proposals: Tuple[Proposal, ...] = attr.ib()
+    proposals: Tuple[Proposal, ...] = attr.ib(hash=False)
     """Journey proposals."""
 
+    key: tuple = attr.ib(init=False, eq=False, hash=True, repr=False)
+    """
+    Identity of the journey: train numbers, stations and departure dates
+    of its segments. Journeys with the same key are the same train journey,
+    possibly with different prices. It is the hash of the journey.
+    """
+
+    # Computed once, as it is used repeatedly by diffs and formatters.
+    # Incomparable prices are not cached, and raise on each access.
+    _lowest_price: Optional[Money] = attr.ib(
+        init=False, eq=False, hash=False, repr=False
+    )
+    _lowest_price_cached: bool = attr.ib(init=False, eq=False, hash=False, repr=False)
+
+    def __attrs_post_init__(self) -> None:
+        key: list = []
+        for segment in self.segments:
+            key += (
+                segment.transport.number,
+                segment.departure_station.sncf_id or segment.departure_station.name,
+                segment.arrival_station.sncf_id or segment.arrival_station.name,
+                timestamp(segment.departure_date),
+            )
+        object.__setattr__(self, "key", tuple(key))
+        try:
+            lowest_price, cached = self.__lowest_price(), True
+        except Exception:  # pylint: disable=broad-except
+            lowest_price, cached = None, False
+        object.__setattr__(self, "_lowest_price", lowest_price)
+        object.__setattr__(self, "_lowest_price_cached", cached)
+
     @property
     def departure_date(self) -> dt.datetime:
         return self.segments[0].departure_date
@@ -121,6 +161,11 @@ class Journey:
         """
         Lowest price for the journey, amongst all proposals.
         """
+        if self._lowest_price_cached:
+            return self._lowest_price
+        return self.__lowest_price()
+
+    def __lowest_price(self) -> Optional[Money]:
         if not self.proposals:
             return None
         return min(x.price for x in self.proposals)
@@ -0,0 +1,243 @@
+"""
+Compact binary snapshots of journeys.
+
+A snapshot stores the columns of a `JourneyStore`: fixed-width integer
+columns, with dates as timestamps and prices in cents, and the strings
+(station names, train numbers...) interned in a single table.
+
+`Snapshot` memory-maps the file, and rebuilds the journeys on access.
+"""
+
+import json
+import math
+import mmap
+import sys
+from array import array
+from pathlib import Path
+from typing import IO, Any, Dict, Iterable, Iterator, List, Optional, Union, overload
+
+from money.currency import Currency
+
+from .models import Journey, Station
+from .table import JourneyStore
+
+MAGIC = b"LOCOSNAP"
+VERSION = 2
+
+# Columns of the `JourneyStore`, and their type codes in the file.
+COLUMNS = {
+    "segments_start": "q",
+    "proposals_start": "q",
+    "equipment": "i",
+    "label": "i",
+    "number": "i",
+    "type": "i",
+    "departure_station": "i",
+    "arrival_station": "i",
+    "departure_date": "q",
+    "departure_offset": "i",
+    "arrival_date": "q",
+    "arrival_offset": "i",
+    "flexibility_level": "i",
+    "price": "q",
+    "currency": "i",
+}
+STATION_FIELDS = ("name", "name_norm", "sncf_id", "sncf_tvs_id")
+STATION_COORDINATES = ("latitude", "longitude")
+
+NONE = -1
+"String code stored for missing values."
+
+
+def write_snapshot(path: Union[str, Path], journeys: Iterable[Journey]) -> int:
+    """
+    Write `journeys` to a snapshot file, and return their number.
+    The journeys are kept in compact columns until they are written.
+    """
+    store = JourneyStore()
+    for journey in journeys:
+        store.add(journey)
+
+    def string(value: Optional[str]) -> int:
+        return NONE if value is None else store.strings.code(value)
+
+    # Missing coordinates are stored as NaN, and the non-numeric ones,
+    # such as the empty strings of the stations database, as strings.
+    def number(value: Any) -> float:
+        return float(value) if isinstance(value, (int, float)) else math.nan
+
+    def text(value: Any) -> int:
+        if value is None or isinstance(value, (int, float)):
+            return NONE
+        return string(value)
+
+    sections = {name: array(t, getattr(store, name)) for name, t in COLUMNS.items()}
+    stations = store.stations.values
+    for field in STATION_FIELDS:
+        sections["station_" + field] = array(
+            "i", (string(getattr(x, field)) for x in stations)
+        )
+    for field in STATION_COORDINATES:
+        coordinates = [getattr(x, field) for x in stations]
+        sections["station_" + field] = array("d", map(number, coordinates))
+        sections["station_" + field + "_text"] = array("i", map(text, coordinates))
+    sections["currency_code"] = array(
+        "i", (string(x.name if x else None) for x in store.currencies.values)
+    )
+    # The strings are added last, as the stations and currencies add new ones.
+    data = [x.encode("utf-8") for x in store.strings.values]
+    offsets = array("q", [0])
+    for x in data:
+        offsets.append(offsets[-1] + len(x))
+    sections["string_offsets"] = offsets
+    sections["string_data"] = array("B", b"".join(data))
+
+    # The header is followed by the sections, aligned on 8 bytes.
+    layout: Dict[str, List[Any]] = {}
+    position = 0
+    for name, values in sections.items():
+        layout[name] = [position, values.typecode, len(values)]
+        position += padded(len(values) * values.itemsize)
+    header = json.dumps(
+        {"version": VERSION, "byteorder": sys.byteorder, "sections": layout}
+    ).encode("utf-8")
+    header += b" " * (padded(len(header)) - len(header))
+
+    with open(path, "wb") as f:
+        f.write(MAGIC)
+        f.write(len(header).to_bytes(8, "little"))
+        f.write(header)
+        for values in sections.values():
+            size = len(values) * values.itemsize
+            values.tofile(f)
+            f.write(b"\0" * (padded(size) - size))
+
+    return len(store.segments_start) - 1
+
+
+def padded(size: int) -> int:
+    return -(-size // 8) * 8
+
+
+class Snapshot:
+    """
+    Journeys of a snapshot file, memory-mapped.
+
+    The columns are read in place, without copies, and the journeys
+    are rebuilt when they are accessed, so opening a snapshot is cheap
+    regardless of its size. Only the strings, stations and currencies
+    tables are loaded.
+    """
+
+    def __init__(self, path: Union[str, Path]) -> None:
+        self.path = Path(path)
+        self.file: IO[bytes] = open(self.path, "rb")
+        self.mmap = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.views: List[memoryview] = []
+
+        if self.mmap[: len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError("{} is not a journeys snapshot".format(self.path))
+        start = len(MAGIC) + 8
+        size = int.from_bytes(self.mmap[len(MAGIC) : start], "little")
+        header = json.loads(self.mmap[start : start + size].decode("utf-8"))
+        if header["version"] != VERSION or header["byteorder"] != sys.byteorder:
+            self.close()
+            raise ValueError(
+                "Unsupported snapshot version or byte order: {}".format(self.path)
+            )
+        self.sections = {
+            name: self.__view(start + size + offset, typecode, length)
+            for name, (offset, typecode, length) in header["sections"].items()
+        }
+
+        self.store = JourneyStore()
+        for name in COLUMNS:
+            setattr(self.store, name, self.sections[name])
+        self.store.strings.values = self.__strings()
+        self.store.stations.values = self.__stations()
+        self.store.currencies.values = [
+            None if x == NONE else Currency[self.store.strings.values[x]]
+            for x in self.sections["currency_code"]
+        ]
+
+    def __view(self, offset: int, typecode: str, length: int) -> memoryview:
+        size = length * array(typecode).itemsize
+        view: memoryview = memoryview(self.mmap)[offset : offset + size]
+        view = view.cast(typecode)  # type: ignore
+        self.views.append(view)
+        return view
+
+    def __strings(self) -> List[str]:
+        data, offsets = self.sections["string_data"], self.sections["string_offsets"]
+        return [
+            str(data[offsets[i] : offsets[i + 1]], "utf-8")
+            for i in range(len(offsets) - 1)
+        ]
+
+    def __stations(self) -> List[Station]:
+        strings = self.store.strings.values
+
+        def string(code: int) -> Any:
+            return None if code == NONE else strings[code]
+
+        def coordinate(field: str) -> List[Any]:
+            values = self.sections["station_" + field]
+            texts = self.sections["station_" + field + "_text"]
+            return [
+                strings[t] if t != NONE else None if math.isnan(x) else x
+                for x, t in zip(values, texts)
+            ]
+
+        name, name_norm, sncf_id, sncf_tvs_id = (
+            self.sections["station_" + x] for x in STATION_FIELDS
+        )
+        latitude, longitude = (coordinate(x) for x in STATION_COORDINATES)
+        return [
+            Station(
+                string(name[i]),
+                string(name_norm[i]),
+                string(sncf_id[i]),
+                string(sncf_tvs_id[i]),
+                latitude[i],
+                longitude[i],
+            )
+            for i in range(len(latitude))
+        ]
+
+    def __len__(self) -> int:
+        return len(self.store.segments_start) - 1
+
+    @overload
+    def __getitem__(self, i: int) -> Journey:
+        ...
+
+    @overload
+    def __getitem__(self, i: slice) -> List[Journey]:
+        ...
+
+    def __getitem__(self, i: Union[int, slice]) -> Union[Journey, List[Journey]]:
+        if isinstance(i, slice):
+            return [self.store.journey(x) for x in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("snapshot index out of range")
+        return self.store.journey(i)
+
+    def __iter__(self) -> Iterator[Journey]:
+        return map(self.store.journey, range(len(self)))
+
+    def close(self) -> None:
+        # The memory map cannot be closed while views on it exist.
+        for view in self.views:
+            view.release()
+        self.views = []
+        self.mmap.close()
+        self.file.close()
+
+    def __enter__(self) -> "Snapshot":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
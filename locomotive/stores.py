@@ -1,19 +1,30 @@
 import difflib
 import logging
+import os
 import re
 import sqlite3
+import tempfile
+import threading
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from csv import DictReader
+from functools import lru_cache
+from itertools import islice
 from pathlib import Path
-from typing import List, Optional, Tuple
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
 
 import requests
 from text_unidecode import unidecode
 
+from .cache import MISSING, LRUCache
 from .exceptions import StationNotFoundException
 from .models import Station
 
-# TODO: Update normalized names in stations db.
-# when `normalize()` is changed.
+logger = logging.getLogger(__name__)
+
+# Must be incremented when `normalize()` is changed,
+# existing stations databases are then updated on load.
+NORMALIZE_VERSION = 1
 
 
 def normalize(s: str) -> str:
@@ -37,6 +48,117 @@ def normalize(s: str) -> str:
     return s
 
 
+# Precompiled version of `normalize()`, used by `normalize_many()`.
+# Must give the same results as `normalize()`.
+NORMALIZE_REPLACEMENTS = (
+    ("gare de ", ""),
+    ("charles de gaulle", "cdg"),
+    ("provence", "pce"),
+    ("perrache", "pche"),
+    ("saint ", "st "),
+    ("zuerich", "zurich"),
+)
+NORMALIZE_REPLACEMENTS_RE = re.compile(
+    "|".join(re.escape(x) for x, _ in NORMALIZE_REPLACEMENTS)
+)
+NORMALIZE_ABBREVIATION_RE = re.compile(r"\s(\w)\w\.?$")
+NORMALIZE_SPACES_RE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=2 ** 16)
+def normalize_fast(s: str) -> str:
+    s = s.lower()
+    # `unidecode()` leaves ASCII characters untouched.
+    if s and max(s) > "\x7f":
+        s = unidecode(s)
+    s = s.replace("-", " ").replace(".", " ")
+    # Replacements must be applied in order since they can overlap,
+    # we only check with a single regex that at least one of them applies.
+    if NORMALIZE_REPLACEMENTS_RE.search(s):
+        for old, new in NORMALIZE_REPLACEMENTS:
+            s = s.replace(old, new)
+    s = s.strip()
+    # The pattern is anchored at the end, so it matches at most once.
+    match = NORMALIZE_ABBREVIATION_RE.search(s)
+    if match:
+        s = s[: match.start()] + " " + match.group(1)
+    return NORMALIZE_SPACES_RE.sub(" ", s)
+
+
+def normalize_many(names: Iterable[str]) -> List[str]:
+    """
+    Normalize a batch of names, giving the same results as `normalize()`.
+    Results are memoized, which helps with repeated names.
+    """
+    return [normalize_fast(s) for s in names]
+
+
+# SQLite LIKE is case-insensitive for ASCII characters only.
+ASCII_LOWER = str.maketrans("ABCDEFGHIJKLMNOPQRSTUVWXYZ", "abcdefghijklmnopqrstuvwxyz")
+
+
+class StationIndex:
+    """
+    In-memory trigram index over normalized station names.
+
+    Returns the same best match as the SQL path of `Stations.find_by_name`
+    (`name_norm LIKE '%query%'` followed by `difflib.get_close_matches`),
+    without scanning the whole table on every lookup.
+    """
+
+    cutoff = 0.1
+
+    def __init__(self, rows: Iterable[Tuple]) -> None:
+        # First row for each normalized name, in table order.
+        self.rows: Dict[str, Tuple] = {}
+        self.keys: Dict[str, str] = {}
+        self.trigrams: Dict[str, Set[str]] = defaultdict(set)
+        for row in rows:
+            name_norm = row[1]
+            if name_norm in self.rows:
+                continue
+            key = name_norm.translate(ASCII_LOWER)
+            self.rows[name_norm] = row
+            self.keys[name_norm] = key
+            for i in range(len(key) - 2):
+                self.trigrams[key[i : i + 3]].add(name_norm)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def candidates(self, query_norm: str) -> Iterable[str]:
+        """
+        Names matching `LIKE '%query_norm%'`.
+        """
+        key = query_norm.translate(ASCII_LOWER)
+        if len(key) < 3:
+            names: Iterable[str] = self.rows
+        else:
+            postings = sorted(
+                (self.trigrams.get(key[i : i + 3], set()) for i in range(len(key) - 2)),
+                key=len,
+            )
+            names = set.intersection(*postings)
+        return [x for x in names if key in self.keys[x]]
+
+    def find(self, query_norm: str) -> Optional[Tuple]:
+        best: Optional[Tuple[float, str]] = None
+        for name_norm in self.candidates(query_norm):
+            # The whole query is the longest matching block,
+            # this is equal to `SequenceMatcher.ratio()` (no autojunk < 200).
+            if query_norm in name_norm and len(query_norm) < 200:
+                length = len(query_norm) + len(name_norm)
+                score = 2.0 * len(query_norm) / length if length else 1.0
+            else:
+                score = difflib.SequenceMatcher(None, name_norm, query_norm).ratio()
+            # Ties are broken as in `difflib.get_close_matches`.
+            if score >= self.cutoff and (best is None or (score, name_norm) > best):
+                best = (score, name_norm)
+        if best:
+            return self.rows[best[1]]
+        return None
+
+
 class Stations:
     """
     A train stations database.
@@ -44,6 +166,7 @@ class Stations:
     """
 
     schema = """
+    DROP TABLE IF EXISTS stations_fts;
     DROP TABLE IF EXISTS stations;
     CREATE TABLE stations (
         name        TEXT NOT NULL,
@@ -56,46 +179,224 @@ class Stations:
     );
     """
 
-    def __init__(self, path: Optional[Path] = None, download: bool = True):
+    # Created after the stations are inserted, which is faster.
+    indexes = """
+    CREATE INDEX IF NOT EXISTS stations_sncf_id ON stations (sncf_id COLLATE NOCASE);
+    CREATE INDEX IF NOT EXISTS stations_sncf_tvs_id ON stations (sncf_tvs_id);
+    DROP TABLE IF EXISTS metadata;
+    CREATE TABLE metadata (
+        key         TEXT PRIMARY KEY,
+        value       INTEGER NOT NULL
+    );
+    """
+
+    # Requires SQLite >= 3.34 for the trigram tokenizer,
+    # which indexes `LIKE '%query%'` patterns of 3 characters or more.
+    fts = """
+    DROP TABLE IF EXISTS stations_fts;
+    CREATE VIRTUAL TABLE stations_fts USING fts5(
+        name_norm, content='stations', content_rowid='rowid', tokenize='trigram'
+    );
+    INSERT INTO stations_fts (stations_fts) VALUES ('rebuild');
+    """
+
+    # Must be incremented when `schema`, `indexes` or `fts` are changed.
+    schema_version = 1
+
+    # Number of CSV rows normalized and inserted at once by `build()`.
+    chunk_size = 10000
+
+    URL = "https://github.com/trainline-eu/stations/raw/master/stations.csv"
+
+    cached_statements = 64
+
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        download: bool = True,
+        index: bool = False,
+        cache_size: int = 1024,
+    ):
+        """
+        :param index: build an in-memory index of station names,
+        for faster lookups by name at the cost of a longer startup.
+        :param cache_size: number of lookups results to keep in memory,
+        0 to disable the cache. See `cache.stats` for hits and misses.
+        """
+        self.cache: Optional[LRUCache] = None
+        if cache_size > 0:
+            self.cache = LRUCache(cache_size)
+        self.connections: Dict[int, sqlite3.Connection] = {}
+        self.lock = threading.Lock()
         self.path = path
         if not self.path:
             self.path = self.default_path()
         if not self.path.exists() and download:
             print(f"{self.path} not found, downloading...")
             self.download(self.path)
+        if self.path.exists() and self.version() != self.current_version():
+            self.upgrade()
+        self.has_fts = self.path.exists() and bool(
+            self.fetchone(
+                "SELECT COUNT(*) FROM sqlite_master WHERE name = 'stations_fts'"
+            )[0]
+        )
+        self.index: Optional[StationIndex] = None
+        if index:
+            self.index = StationIndex(
+                self.fetchall("SELECT * FROM stations ORDER BY rowid")
+            )
 
     def __conn__(self) -> sqlite3.Connection:
-        # We can set `check_same_thread` to False
-        # since we open the database in read-only mode.
-        conn = sqlite3.connect(
-            f"file:{self.path}?mode=ro", check_same_thread=False, uri=True
-        )
-        conn.set_trace_callback(logging.debug)  # type: ignore
+        """
+        Return the connection of the current thread, opening it if needed.
+        Connections are kept open, and their prepared statements cached,
+        until `close()` is called.
+        """
+        thread_id = threading.get_ident()
+        conn = self.connections.get(thread_id)
+        if conn is None:
+            # We can set `check_same_thread` to False
+            # since we open the database in read-only mode.
+            conn = sqlite3.connect(
+                f"file:{self.path}?mode=ro",
+                check_same_thread=False,
+                uri=True,
+                cached_statements=self.cached_statements,
+            )
+            if logger.isEnabledFor(logging.DEBUG):
+                conn.set_trace_callback(logger.debug)  # type: ignore
+            with self.lock:
+                self.connections[thread_id] = conn
         return conn
 
+    def close(self) -> None:
+        """
+        Close the connections of all threads.
+        """
+        with self.lock:
+            connections = list(self.connections.values())
+            self.connections.clear()
+        for conn in connections:
+            conn.close()
+
+    def __enter__(self) -> "Stations":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
     def fetchone(self, sql: str, parameters: Tuple = tuple()) -> Tuple:
-        with self.__conn__() as conn:
-            row: Tuple = conn.execute(sql, parameters).fetchone()
-            return row
+        row: Tuple = self.__conn__().execute(sql, parameters).fetchone()
+        return row
 
     def fetchall(self, sql: str, parameters: Tuple = tuple()) -> List[Tuple]:
-        with self.__conn__() as conn:
-            rows: List[Tuple] = conn.execute(sql, parameters).fetchall()
-            return rows
+        rows: List[Tuple] = self.__conn__().execute(sql, parameters).fetchall()
+        return rows
+
+    def version(self) -> Tuple[int, int]:
+        """
+        Return the schema and normalization versions of the database,
+        `(0, 0)` if it predates versioning.
+        """
+        try:
+            rows = self.fetchall("SELECT key, value FROM metadata")
+        except sqlite3.OperationalError:
+            return 0, 0
+        versions: Dict[str, int] = dict(rows)
+        return versions.get("schema_version", 0), versions.get("normalize_version", 0)
+
+    @classmethod
+    def current_version(cls) -> Tuple[int, int]:
+        return cls.schema_version, NORMALIZE_VERSION
+
+    def upgrade(self) -> None:
+        """
+        Re-normalize the station names and rebuild the indexes in place.
+        The database is left untouched if it cannot be written.
+        """
+        logger.info("Upgrading %s to version %s", self.path, self.current_version())
+        try:
+            with sqlite3.connect(str(self.path)) as conn:
+                rows = conn.execute("SELECT rowid, name FROM stations").fetchall()
+                names_norm = normalize_many(name for _, name in rows)
+                conn.executemany(
+                    "UPDATE stations SET name_norm = ? WHERE rowid = ?",
+                    [(x, rowid) for (rowid, _), x in zip(rows, names_norm)],
+                )
+                self.create_indexes(conn)
+        except sqlite3.OperationalError as exception:
+            logger.warning("Cannot upgrade %s: %s", self.path, exception)
+
+    @classmethod
+    def create_indexes(cls, conn: sqlite3.Connection) -> None:
+        conn.executescript(cls.indexes)
+        try:
+            conn.executescript(cls.fts)
+        except sqlite3.OperationalError as exception:
+            logger.warning("Full-text search index not available: %s", exception)
+        conn.executemany(
+            "INSERT INTO metadata VALUES (?, ?)",
+            zip(("schema_version", "normalize_version"), cls.current_version()),
+        )
 
     def count(self) -> int:
         return int(self.fetchone("SELECT COUNT(*) FROM stations")[0])
 
+    def cached(self, method: str, query: str, fn: Callable[[str], Any]) -> Any:
+        if self.cache is None:
+            return fn(query)
+        return self.cache.get_or_put((method, query), lambda: fn(query))
+
     def find_by_id(self, query: str) -> Optional[Station]:
-        sql = "SELECT * FROM stations WHERE lower(sncf_id) LIKE ?"
-        row = self.fetchone(sql, (query.lower(),))
+        station: Optional[Station] = self.cached("id", query, self.__find_by_id)
+        return station
+
+    def find_by_name(self, query: str) -> Optional[Station]:
+        station: Optional[Station] = self.cached("name", query, self.__find_by_name)
+        return station
+
+    def find(self, query: str) -> Optional[Station]:
+        station: Optional[Station] = self.cached("find", query, self.__find)
+        return station
+
+    def find_or_create(self, query: str) -> Station:
+        station: Station = self.cached("create", query, self.__find_or_create)
+        return station
+
+    def find_by_tvs_id(self, query: str) -> Optional[Station]:
+        station: Optional[Station] = self.cached("tvs", query, self.__find_by_tvs_id)
+        return station
+
+    def __find_by_id(self, query: str) -> Optional[Station]:
+        sql = "SELECT * FROM stations WHERE sncf_id = ? COLLATE NOCASE LIMIT 1"
+        row = self.fetchone(sql, (query,))
         if row:
             return Station.from_row(row)
         return None
 
-    def find_by_name(self, query: str) -> Optional[Station]:
+    def __find_by_tvs_id(self, query: str) -> Optional[Station]:
+        sql = "SELECT * FROM stations WHERE sncf_tvs_id = ? LIMIT 1"
+        row = self.fetchone(sql, (query,))
+        if row:
+            return Station.from_row(row)
+        return None
+
+    def __find_by_name(self, query: str) -> Optional[Station]:
         query_norm = normalize(query)
+        # LIKE wildcards are only handled by the SQL path.
+        if self.index is not None and not ("%" in query_norm or "_" in query_norm):
+            row = self.index.find(query_norm)
+            if row:
+                return Station.from_row(row)
+            return None
         sql = "SELECT * FROM stations WHERE name_norm LIKE ?"
+        if self.has_fts:
+            sql = """
+            SELECT stations.* FROM stations_fts
+            JOIN stations ON stations.rowid = stations_fts.rowid
+            WHERE stations_fts.name_norm LIKE ? ORDER BY stations.rowid
+            """
         rows = self.fetchall(sql, (f"%{query_norm}%",))
         matches = difflib.get_close_matches(
             query_norm, [x[1] for x in rows], cutoff=0.1, n=1
@@ -105,52 +406,170 @@ class Stations:
             return Station.from_row(row)
         return None
 
-    def find(self, query: str) -> Optional[Station]:
-        station = self.find_by_id(query)
+    def __find(self, query: str) -> Optional[Station]:
+        station = self.__find_by_id(query)
         if not station:
-            station = self.find_by_name(query)
+            station = self.__find_by_name(query)
         return station
 
-    def find_or_create(self, query: str) -> Station:
-        station = self.find(query)
+    def __find_or_create(self, query: str) -> Station:
+        station = self.__find(query)
         if not station:
-            station = Station(query, normalize(query), None, None, None, None)
+            station = self.__create(query)
         return station
 
+    @staticmethod
+    def __create(query: str) -> Station:
+        return Station(query, normalize(query), None, None, None, None)
+
     def find_or_raise(self, query: str) -> Station:
         station = self.find(query)
         if not station:
             raise StationNotFoundException(query)
         return station
 
+    def find_many(self, queries: Iterable[str]) -> Dict[str, Station]:
+        """
+        Find the stations for a batch of ids or names, as `find()` would.
+        Ids are resolved with a single query, names one by one.
+        Queries without a matching station are absent from the result.
+        """
+        queries = list(dict.fromkeys(queries))
+        stations: Dict[str, Optional[Station]] = {}
+        if self.cache is not None:
+            for query in queries:
+                station = self.cache.get(("find", query))
+                if station is not MISSING:
+                    stations[query] = station
+
+        missing = [x for x in queries if x not in stations]
+        by_id = self.__find_many_by_id(missing)
+        for query in missing:
+            station = by_id.get(query.translate(ASCII_LOWER))
+            if not station:
+                station = self.__find_by_name(query)
+            if self.cache is not None:
+                self.cache.put(("find", query), station)
+            stations[query] = station
+
+        return {k: v for k, v in stations.items() if v}
+
+    def find_many_or_create(self, queries: Iterable[str]) -> Dict[str, Station]:
+        queries = list(queries)
+        stations = self.find_many(queries)
+        for query in queries:
+            if query not in stations:
+                stations[query] = self.__create(query)
+        return stations
+
+    def find_many_or_raise(self, queries: Iterable[str]) -> Dict[str, Station]:
+        queries = list(queries)
+        stations = self.find_many(queries)
+        for query in queries:
+            if query not in stations:
+                raise StationNotFoundException(query)
+        return stations
+
+    def __find_many_by_id(self, queries: List[str]) -> Dict[str, Station]:
+        stations: Dict[str, Station] = {}
+        # Stay below SQLITE_MAX_VARIABLE_NUMBER (999 before SQLite 3.32).
+        for i in range(0, len(queries), 500):
+            chunk = queries[i : i + 500]
+            sql = "SELECT * FROM stations WHERE sncf_id COLLATE NOCASE IN ({})"
+            sql += " ORDER BY rowid"
+            sql = sql.format(",".join("?" * len(chunk)))
+            for row in self.fetchall(sql, tuple(chunk)):
+                key = row[3].translate(ASCII_LOWER)
+                if key not in stations:
+                    stations[key] = Station.from_row(row)
+        return stations
+
     @classmethod
     def default_path(cls) -> Path:
         return Path.home().joinpath(".locomotive", "stations.sqlite3")
 
     @classmethod
-    def download(cls, path: Path) -> None:
-        path.parent.mkdir(exist_ok=True, parents=True)
-
+    def download(cls, path: Path, url: str = URL, workers: int = 0) -> None:
+        """
+        Download trainline's stations.csv and build the database at `path`.
+        The CSV is streamed and never fully loaded in memory.
+        """
         print("Downloading trainline-eu/stations/stations.csv...")
-        url = "https://github.com/trainline-eu/stations/raw/master/stations.csv"
-        csv = requests.get(url).content.decode("utf-8").split("\n")
-
-        print("Extracting stations...")
-        rdr = DictReader(csv, delimiter=";")
-        stations = [
-            (
-                row["name"],
-                normalize(row["name"]),
-                row["country"],
-                row["sncf_id"],
-                row["sncf_tvs_id"],
-                row["latitude"],
-                row["longitude"],
-            )
-            for row in rdr
-        ]
+        with requests.get(url, stream=True, timeout=60) as res:
+            res.raise_for_status()
+            res.encoding = "utf-8"
+            cls.build(path, res.iter_lines(decode_unicode=True), workers)
+
+    @classmethod
+    def build_from_csv(cls, path: Path, csv_path: Path, workers: int = 0) -> None:
+        """
+        Build the database at `path` from a local copy of trainline's stations.csv.
+        """
+        with open(str(csv_path), encoding="utf-8", newline="") as f:
+            cls.build(path, f, workers)
+
+    @classmethod
+    def build(cls, path: Path, lines: Iterable[str], workers: int = 0) -> None:
+        """
+        Build the database at `path` from the lines of trainline's stations.csv.
+
+        The database is written to a temporary file, in a single transaction
+        and without journaling, and then atomically renamed to `path`.
+
+        :param workers: number of processes used to normalize the station names,
+        0 to normalize them in the current process.
+        """
+        path.parent.mkdir(exist_ok=True, parents=True)
+        fd, tmp = tempfile.mkstemp(dir=str(path.parent), suffix=".tmp")
+        os.close(fd)
 
-        with sqlite3.connect(str(path)) as conn:
-            print("Inserting stations...")
-            conn.executescript(cls.schema)
-            conn.executemany("INSERT INTO stations VALUES (?,?,?,?,?,?,?)", stations)
+        executor = ProcessPoolExecutor(workers) if workers > 0 else None
+        try:
+            conn = sqlite3.connect(tmp)
+            try:
+                conn.execute("PRAGMA journal_mode = OFF")
+                conn.execute("PRAGMA synchronous = OFF")
+                conn.executescript(cls.schema)
+                print("Inserting stations...")
+                with conn:
+                    rdr = DictReader(lines, delimiter=";")
+                    for chunk in iter(lambda: list(islice(rdr, cls.chunk_size)), []):
+                        names = [row["name"] for row in chunk]
+                        if executor:
+                            size = len(names) // workers + 1
+                            batches = executor.map(
+                                normalize_many,
+                                (
+                                    names[i : i + size]
+                                    for i in range(0, len(names), size)
+                                ),
+                            )
+                            names_norm = [x for batch in batches for x in batch]
+                        else:
+                            names_norm = normalize_many(names)
+                        conn.executemany(
+                            "INSERT INTO stations VALUES (?,?,?,?,?,?,?)",
+                            (
+                                (
+                                    row["name"],
+                                    name_norm,
+                                    row["country"],
+                                    row["sncf_id"],
+                                    row["sncf_tvs_id"],
+                                    row["latitude"],
+                                    row["longitude"],
+                                )
+                                for row, name_norm in zip(chunk, names_norm)
+                            ),
+                        )
+                print("Indexing stations...")
+                with conn:
+                    cls.create_indexes(conn)
+            finally:
+                conn.close()
+            os.replace(tmp, str(path))
+        finally:
+            if executor:
+                executor.shutdown()
+            if os.path.exists(tmp):
+                os.remove(tmp)
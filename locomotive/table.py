@@ -0,0 +1,300 @@
+"""
+Columnar representation of large sets of journeys.
+"""
+
+import datetime as dt
+import heapq
+from array import array
+from itertools import compress
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Generic,
+    Hashable,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    TypeVar,
+    Union,
+)
+
+from money.currency import Currency
+from money.money import Money
+
+from .models import Journey, Proposal, Segment, Station, Transport
+from .models.journey import EPOCH, timestamp
+
+T = TypeVar("T", bound=Hashable)
+
+NAIVE = -(2 ** 31)
+"UTC offset stored for naive dates."
+
+NO_PRICE = -1
+"Price stored for journeys without proposals."
+
+
+class Interned(Generic[T]):
+    "Table of distinct values, referenced by their index."
+
+    def __init__(self) -> None:
+        self.values: List[T] = []
+        self.codes: Dict[T, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def code(self, value: T) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+def to_cents(price: Union[Money, float]) -> int:
+    if isinstance(price, Money):
+        return int(price.sub_units)
+    return round(price * 100)
+
+
+class JourneyStore:
+    """
+    Flattened segments and proposals of a set of journeys,
+    shared by the tables built from them.
+    """
+
+    def __init__(self) -> None:
+        self.strings: Interned[str] = Interned()
+        self.stations: Interned[Station] = Interned()
+        self.currencies: Interned[Optional[Currency]] = Interned()
+        # Offsets of the segments and proposals of each journey.
+        self.segments_start = array("l", [0])
+        self.proposals_start = array("l", [0])
+        # Segments
+        self.equipment = array("l")
+        self.label = array("l")
+        self.number = array("l")
+        self.type = array("l")
+        self.departure_station = array("l")
+        self.arrival_station = array("l")
+        self.departure_date = array("q")
+        self.departure_offset = array("l")
+        self.arrival_date = array("q")
+        self.arrival_offset = array("l")
+        # Proposals
+        self.flexibility_level = array("l")
+        self.price = array("q")
+        self.currency = array("l")
+        self.timezones: Dict[int, dt.tzinfo] = {}
+
+    def add(self, journey: Journey) -> int:
+        "Store a journey and return its row."
+        string = self.strings.code
+        for segment in journey.segments:
+            transport = segment.transport
+            self.equipment.append(string(transport.equipment))
+            self.label.append(string(transport.label))
+            self.number.append(string(transport.number))
+            self.type.append(string(transport.type))
+            self.departure_station.append(self.stations.code(segment.departure_station))
+            self.arrival_station.append(self.stations.code(segment.arrival_station))
+            self.departure_date.append(timestamp(segment.departure_date))
+            self.departure_offset.append(offset(segment.departure_date))
+            self.arrival_date.append(timestamp(segment.arrival_date))
+            self.arrival_offset.append(offset(segment.arrival_date))
+        for proposal in journey.proposals:
+            price = proposal.price
+            currency = price.currency if isinstance(price, Money) else None
+            self.flexibility_level.append(string(proposal.flexibility_level))
+            self.price.append(to_cents(price))
+            self.currency.append(self.currencies.code(currency))
+        self.segments_start.append(len(self.number))
+        self.proposals_start.append(len(self.price))
+        return len(self.segments_start) - 2
+
+    def journey(self, row: int) -> Journey:
+        "Rebuild the journey stored at `row`."
+        strings = self.strings.values
+        stations = self.stations.values
+        segments = []
+        for i in range(self.segments_start[row], self.segments_start[row + 1]):
+            transport = Transport(
+                strings[self.equipment[i]],
+                strings[self.label[i]],
+                strings[self.number[i]],
+                strings[self.type[i]],
+            )
+            segments.append(
+                Segment(
+                    transport,
+                    stations[self.departure_station[i]],
+                    stations[self.arrival_station[i]],
+                    self.date(self.departure_date[i], self.departure_offset[i]),
+                    self.date(self.arrival_date[i], self.arrival_offset[i]),
+                )
+            )
+        proposals = []
+        for i in range(self.proposals_start[row], self.proposals_start[row + 1]):
+            currency = self.currencies.values[self.currency[i]]
+            price: Union[Money, float] = (
+                Money.from_sub_units(self.price[i], currency)
+                if currency
+                else self.price[i] / 100
+            )
+            proposals.append(Proposal(strings[self.flexibility_level[i]], price))
+        return Journey(tuple(segments), tuple(proposals))
+
+    def date(self, ts: int, utcoffset: int) -> dt.datetime:
+        if utcoffset == NAIVE:
+            return EPOCH + dt.timedelta(seconds=ts)
+        tz = self.timezones.get(utcoffset)
+        if tz is None:
+            tz = self.timezones[utcoffset] = dt.timezone(
+                dt.timedelta(seconds=utcoffset)
+            )
+        return dt.datetime.fromtimestamp(ts, tz)
+
+
+def offset(date: dt.datetime) -> int:
+    utcoffset = date.utcoffset()
+    if utcoffset is None:
+        return NAIVE
+    return utcoffset // dt.timedelta(seconds=1)
+
+
+class JourneyTable:
+    """
+    Columnar representation of a list of journeys.
+
+    Each journey is a row, with the following columns:
+
+    - `departure`, `arrival`: timestamps, in seconds
+      (see `locomotive.models.journey.timestamp`),
+    - `origin`, `destination`: station ids,
+    - `number`: train numbers of the segments, separated by `/`,
+    - `price`: lowest price in cents, or `NO_PRICE`.
+
+    Filtering, sorting and grouping work on the columns
+    and return new tables sharing the same storage.
+    `Journey` objects are rebuilt on demand, with dates to the second.
+    """
+
+    COLUMNS = ("departure", "arrival", "origin", "destination", "number", "price")
+
+    def __init__(self, store: JourneyStore, columns: Dict[str, array]) -> None:
+        self.store = store
+        self.columns = columns
+
+    @classmethod
+    def from_journeys(cls, journeys: Iterable[Journey]) -> "JourneyTable":
+        store = JourneyStore()
+        string = store.strings.code
+        columns = {
+            "row": array("l"),
+            "departure": array("q"),
+            "arrival": array("q"),
+            "origin": array("l"),
+            "destination": array("l"),
+            "number": array("l"),
+            "price": array("q"),
+        }
+        for journey in journeys:
+            columns["row"].append(store.add(journey))
+            first, last = journey.segments[0], journey.segments[-1]
+            columns["departure"].append(timestamp(first.departure_date))
+            columns["arrival"].append(timestamp(last.arrival_date))
+            columns["origin"].append(string(station_id(first.departure_station)))
+            columns["destination"].append(string(station_id(last.arrival_station)))
+            number = "/".join(x.transport.number for x in journey.segments)
+            columns["number"].append(string(number))
+            prices = [to_cents(x.price) for x in journey.proposals]
+            columns["price"].append(min(prices) if prices else NO_PRICE)
+        return cls(store, columns)
+
+    def __len__(self) -> int:
+        return len(self.columns["row"])
+
+    def __getitem__(self, i: int) -> Journey:
+        return self.store.journey(self.columns["row"][i])
+
+    def __iter__(self) -> Iterator[Journey]:
+        return map(self.store.journey, self.columns["row"])
+
+    def to_journeys(self) -> List[Journey]:
+        return list(self)
+
+    def column(self, name: str) -> List[Any]:
+        "Values of a column, with the station ids and train numbers decoded."
+        values = self.columns[name]
+        if name in ("origin", "destination", "number"):
+            strings = self.store.strings.values
+            return [strings[x] for x in values]
+        return list(values)
+
+    def take(self, indices: Iterable[int]) -> "JourneyTable":
+        "Table of the rows at `indices`."
+        indices = list(indices)
+        columns = {
+            name: array(values.typecode, map(values.__getitem__, indices))
+            for name, values in self.columns.items()
+        }
+        return JourneyTable(self.store, columns)
+
+    def filter(self, mask: Iterable[bool]) -> "JourneyTable":
+        "Table of the rows where `mask` is true."
+        mask = list(mask)
+        columns = {
+            name: array(values.typecode, compress(values, mask))
+            for name, values in self.columns.items()
+        }
+        return JourneyTable(self.store, columns)
+
+    def where(self, column: str, predicate: Callable[[Any], bool]) -> "JourneyTable":
+        """
+        Table of the rows where `predicate` is true for `column`, e.g.
+        `table.where("price", lambda x: 0 <= x < 5000)`.
+        """
+        return self.filter(map(predicate, self.column(column)))
+
+    def sort(self, by: str = "departure", reverse: bool = False) -> "JourneyTable":
+        values = self.column(by)
+        return self.take(
+            sorted(range(len(self)), key=values.__getitem__, reverse=reverse)
+        )
+
+    def group_by(self, by: Union[str, Sequence[str]]) -> Dict[Any, "JourneyTable"]:
+        """
+        Tables of the rows with the same values in the `by` column(s).
+        Several columns are grouped on the tuple of their values.
+        """
+        names = [by] if isinstance(by, str) else list(by)
+        # Group on the raw (encoded) values, and decode the keys once.
+        groups: Dict[Any, List[int]] = {}
+        for i, key in enumerate(zip(*(self.columns[x] for x in names))):
+            groups.setdefault(key, []).append(i)
+        strings = self.store.strings.values
+        decode = [x in ("origin", "destination", "number") for x in names]
+        tables = {}
+        for key, indices in groups.items():
+            key = tuple(strings[x] if d else x for x, d in zip(key, decode))
+            tables[key[0] if isinstance(by, str) else key] = self.take(indices)
+        return tables
+
+    def top_k(self, k: int, by: str = "price", largest: bool = False) -> "JourneyTable":
+        """
+        The `k` rows with the smallest (or largest) values of `by`.
+        Journeys without a price are ignored when ranking by price.
+        """
+        values = self.column(by)
+        indices: Iterable[int] = range(len(self))
+        if by == "price":
+            indices = [i for i in indices if values[i] != NO_PRICE]
+        select = heapq.nlargest if largest else heapq.nsmallest
+        return self.take(select(k, indices, key=values.__getitem__))
+
+
+def station_id(station: Station) -> str:
+    return station.sncf_id or station.name
@@ -0,0 +1,463 @@
+"""
+Price watch: periodically re-fetch travel requests and report the changes.
+
+The last results of each watched request are stored in a SQLite
+`SnapshotStore`. When new results are fetched, and their journeys
+(`Journey.key`) or prices changed, they are compared to the snapshot
+with `journeys_diff`, and the diffs are emitted to sinks.
+"""
+
+import datetime as dt
+import hashlib
+import heapq
+import json
+import logging
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import IO, Any, Callable, Dict, List, Optional, Tuple, Union
+
+import attr
+import requests
+from money.currency import Currency
+from money.money import Money
+
+from .api.client import TravelClient
+from .api.requests import TravelRequest, request_key
+from .diff import JourneyDiff, JourneyDiffType, journeys_diff
+from .models import Journey, Proposal, Segment, Station, Transport
+from .models.journey import EPOCH, timestamp
+from .table import NAIVE, Interned, offset, station_id, to_cents
+
+logger = logging.getLogger(__name__)
+
+
+@attr.s(frozen=True)
+class Watch:
+    "A travel request, fetched every `interval` seconds."
+
+    request: TravelRequest = attr.ib()
+    interval: float = attr.ib(default=3600)
+
+    @property
+    def key(self) -> str:
+        "Key identifying the watch in a `SnapshotStore`."
+        return request_key(self.request)
+
+    @property
+    def route(self) -> str:
+        "Human-readable name of the watch, e.g. `FRBES-FRPAR@2020-01-01`."
+        req = self.request
+        return "{}-{}@{}".format(
+            station_id(req.departure_station),
+            station_id(req.arrival_station),
+            req.date.date().isoformat(),
+        )
+
+
+def journey_price(journey: Journey) -> Optional[int]:
+    "Lowest price of a journey, in cents."
+    price = journey.lowest_price
+    return None if price is None else to_cents(price)
+
+
+class SnapshotStore:
+    """
+    Last known journeys of each watch, in a SQLite database.
+
+    Each journey is a row of plain values: its key, departure timestamp,
+    lowest price in cents, and its segments and proposals as JSON, with
+    dates as timestamps and UTC offsets, prices in cents, and stations
+    by id. The distinct stations are stored once, in their own table.
+
+    A digest of the keys and lowest prices of the journeys of each watch
+    is kept in memory, so that unchanged results are detected without
+    reading the snapshot, and only the changed journeys are written.
+    """
+
+    schema = """
+    CREATE TABLE IF NOT EXISTS snapshots (
+        watch TEXT PRIMARY KEY,
+        digest TEXT NOT NULL,
+        updated REAL NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS journeys (
+        watch TEXT NOT NULL,
+        key TEXT NOT NULL,
+        departure INTEGER NOT NULL,
+        price INTEGER,
+        segments TEXT NOT NULL,
+        proposals TEXT NOT NULL,
+        PRIMARY KEY (watch, key)
+    );
+    CREATE TABLE IF NOT EXISTS stations (
+        id INTEGER PRIMARY KEY,
+        name TEXT,
+        name_norm TEXT,
+        sncf_id TEXT,
+        sncf_tvs_id TEXT,
+        latitude,
+        longitude
+    );
+    """
+
+    def __init__(self, path: Union[str, Path] = ":memory:") -> None:
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(str(path), timeout=30, check_same_thread=False)
+        with self.conn:
+            self.conn.execute("PRAGMA journal_mode = WAL")
+            # A snapshot lost in a power failure is re-fetched at the next poll.
+            self.conn.execute("PRAGMA synchronous = NORMAL")
+            self.conn.executescript(self.schema)
+        self.digests: Dict[str, str] = dict(
+            self.conn.execute("SELECT watch, digest FROM snapshots")
+        )
+        self.stations: Interned[Station] = Interned()
+        for row in self.conn.execute("SELECT * FROM stations ORDER BY id"):
+            self.stations.code(Station(*row[1:]))
+
+    @staticmethod
+    def digest(journeys: List[Journey]) -> str:
+        prices = sorted((x.key, journey_price(x)) for x in journeys)
+        return hashlib.sha1(repr(prices).encode("utf-8")).hexdigest()
+
+    def journeys(self, watch: str) -> List[Journey]:
+        "Journeys of the last snapshot of `watch`, by departure date."
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT segments, proposals FROM journeys WHERE watch = ? "
+                "ORDER BY departure",
+                (watch,),
+            ).fetchall()
+        return [self.__decode(*row) for row in rows]
+
+    def update(
+        self, watch: str, journeys: List[Journey], now: Optional[float] = None
+    ) -> Optional[List[JourneyDiff]]:
+        """
+        Replace the snapshot of `watch` with `journeys`,
+        and return the diffs with the previous snapshot,
+        or None if the journeys and their prices did not change.
+        """
+        now = time.time() if now is None else now
+        digest = self.digest(journeys)
+        if self.digests.get(watch) == digest:
+            with self.lock, self.conn:
+                self.conn.execute(
+                    "UPDATE snapshots SET updated = ? WHERE watch = ?", (now, watch)
+                )
+            return None
+
+        diffs = journeys_diff(self.journeys(watch), journeys)
+        removed = [
+            (watch, journey_key(x.old)) for x in diffs if x.new is None and x.old
+        ]
+        changed = [x.new for x in diffs if x.new is not None and x.new != x.old]
+        # New stations are interned while encoding the journeys,
+        # and forgotten if they cannot be stored.
+        start = len(self.stations)
+        try:
+            rows = [(watch,) + self.__encode(x) for x in changed]
+            stations = list(enumerate(self.stations.values))[start:]
+            with self.lock, self.conn:
+                self.conn.executemany(
+                    "INSERT INTO stations VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    ((i,) + attr.astuple(x) for i, x in stations),
+                )
+                self.conn.executemany(
+                    "DELETE FROM journeys WHERE watch = ? AND key = ?", removed
+                )
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO journeys VALUES (?, ?, ?, ?, ?, ?)", rows
+                )
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO snapshots VALUES (?, ?, ?)",
+                    (watch, digest, now),
+                )
+        except Exception:
+            for station in self.stations.values[start:]:
+                del self.stations.codes[station]
+            del self.stations.values[start:]
+            raise
+        self.digests[watch] = digest
+        return diffs
+
+    def remove(self, watch: str) -> None:
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM snapshots WHERE watch = ?", (watch,))
+            self.conn.execute("DELETE FROM journeys WHERE watch = ?", (watch,))
+        self.digests.pop(watch, None)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __encode(self, journey: Journey) -> Tuple[str, int, Optional[int], str, str]:
+        segments = [
+            [
+                x.transport.equipment,
+                x.transport.label,
+                x.transport.number,
+                x.transport.type,
+                self.stations.code(x.departure_station),
+                self.stations.code(x.arrival_station),
+                timestamp(x.departure_date),
+                offset(x.departure_date),
+                timestamp(x.arrival_date),
+                offset(x.arrival_date),
+            ]
+            for x in journey.segments
+        ]
+        proposals = [
+            [
+                x.flexibility_level,
+                to_cents(x.price),
+                x.price.currency.name if isinstance(x.price, Money) else None,
+            ]
+            for x in journey.proposals
+        ]
+        return (
+            journey_key(journey),
+            timestamp(journey.departure_date),
+            journey_price(journey),
+            json.dumps(segments),
+            json.dumps(proposals),
+        )
+
+    def __decode(self, segments: str, proposals: str) -> Journey:
+        return Journey(
+            tuple(
+                Segment(
+                    Transport(equipment, label, number, type_),
+                    self.stations.values[departure_station],
+                    self.stations.values[arrival_station],
+                    from_timestamp(departure_date, departure_offset),
+                    from_timestamp(arrival_date, arrival_offset),
+                )
+                for (
+                    equipment,
+                    label,
+                    number,
+                    type_,
+                    departure_station,
+                    arrival_station,
+                    departure_date,
+                    departure_offset,
+                    arrival_date,
+                    arrival_offset,
+                ) in json.loads(segments)
+            ),
+            tuple(
+                Proposal(
+                    flexibility_level,
+                    Money.from_sub_units(price, Currency[currency])
+                    if currency
+                    else price / 100,
+                )
+                for flexibility_level, price, currency in json.loads(proposals)
+            ),
+        )
+
+
+def journey_key(journey: Journey) -> str:
+    "Key of a journey in a `SnapshotStore`."
+    return json.dumps(journey.key)
+
+
+def from_timestamp(ts: int, utcoffset: int) -> dt.datetime:
+    "Inverse of `timestamp`, with the UTC offset stored by `JourneyStore`."
+    if utcoffset == NAIVE:
+        return EPOCH + dt.timedelta(seconds=ts)
+    return dt.datetime.fromtimestamp(ts, dt.timezone(dt.timedelta(seconds=utcoffset)))
+
+
+def diff_event(watch: Watch, diff: JourneyDiff) -> Dict[str, Any]:
+    "JSON-serializable description of a diff."
+    journey = diff.new or diff.old
+    assert journey is not None
+    old_price = journey_price(diff.old) if diff.old else None
+    new_price = journey_price(diff.new) if diff.new else None
+    return {
+        "watch": watch.route,
+        "type": diff.diff_type.name if diff.diff_type else None,
+        "departure_date": journey.departure_date.isoformat(),
+        "arrival_date": journey.arrival_date.isoformat(),
+        "trains": [x.transport.number for x in journey.segments],
+        "old_price": None if old_price is None else old_price / 100,
+        "new_price": None if new_price is None else new_price / 100,
+    }
+
+
+class JSONLinesSink:
+    "Write one JSON object per diff to a text stream (stdout by default)."
+
+    def __init__(self, stream: Optional[IO[str]] = None) -> None:
+        self.stream = stream or sys.stdout
+
+    def emit(self, watch: Watch, diffs: List[JourneyDiff]) -> None:
+        lines = [json.dumps(diff_event(watch, x)) + "\n" for x in diffs]
+        self.stream.write("".join(lines))
+        self.stream.flush()
+
+    def close(self) -> None:
+        pass
+
+
+class FileSink(JSONLinesSink):
+    "Append the diffs to a JSON lines file."
+
+    def __init__(self, path: Union[str, Path]) -> None:
+        super().__init__(open(path, "a"))
+
+    def close(self) -> None:
+        self.stream.close()
+
+
+class WebhookSink:
+    """
+    POST the diffs of each fetch to `url`, as a JSON object
+    with a `watch` name and an `events` list.
+    Errors are logged, and the diffs are not sent again.
+    """
+
+    def __init__(
+        self, url: str, session: Optional[requests.Session] = None, timeout: float = 10,
+    ) -> None:
+        self.url = url
+        self.session = session or requests.Session()
+        self.timeout = timeout
+
+    def emit(self, watch: Watch, diffs: List[JourneyDiff]) -> None:
+        events = [diff_event(watch, x) for x in diffs]
+        try:
+            res = self.session.post(
+                self.url,
+                json={"watch": watch.route, "events": events},
+                timeout=self.timeout,
+            )
+            res.raise_for_status()
+        except requests.RequestException as e:
+            logger.error("Cannot send %s events to %s: %s", len(events), self.url, e)
+
+    def close(self) -> None:
+        self.session.close()
+
+
+class Watcher:
+    """
+    Fetch the watched requests when they are due, with up to `max_workers`
+    requests in parallel, and emit the diffs with their previous results
+    to the `sinks`. Unchanged journeys are not emitted unless `changes_only`
+    is False, and the first results of a watch are recorded without
+    being emitted unless `emit_initial` is True.
+
+    Due watches are kept in a heap, so that thousands of watches
+    can be scheduled by a single watcher.
+    """
+
+    def __init__(
+        self,
+        client: TravelClient,
+        store: SnapshotStore,
+        sinks: List[Any],
+        max_workers: int = 8,
+        changes_only: bool = True,
+        emit_initial: bool = False,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.client = client
+        self.store = store
+        self.sinks = sinks
+        self.max_workers = max_workers
+        self.changes_only = changes_only
+        self.emit_initial = emit_initial
+        self.clock = clock
+        self.watches: Dict[str, Watch] = {}
+        # (due time, key) of each watch, stale entries are skipped.
+        self.queue: List[Tuple[float, str]] = []
+        self.due: Dict[str, float] = {}
+        self.stopped = threading.Event()
+
+    def add(self, req: TravelRequest, interval: float = 3600) -> Watch:
+        "Watch `req`, starting with the next `run_pending`."
+        watch = Watch(req, interval)
+        self.watches[watch.key] = watch
+        self.__schedule(watch.key, self.clock())
+        return watch
+
+    def remove(self, watch: Watch) -> None:
+        "Stop watching, and forget the snapshot of `watch`."
+        self.watches.pop(watch.key, None)
+        self.due.pop(watch.key, None)
+        self.store.remove(watch.key)
+
+    def run_pending(self) -> int:
+        "Fetch the due watches, and return their number."
+        now = self.clock()
+        due = []
+        while self.queue and self.queue[0][0] <= now:
+            time_, key = heapq.heappop(self.queue)
+            if key in self.watches and self.due.get(key) == time_:
+                due.append(self.watches[key])
+        if not due:
+            return 0
+
+        with ThreadPoolExecutor(min(self.max_workers, len(due))) as executor:
+            futures = [
+                (watch, executor.submit(self.client.travel_request_full, watch.request))
+                for watch in due
+            ]
+            # The snapshots are updated from this thread only.
+            for watch, future in futures:
+                try:
+                    self.__update(watch, future.result())
+                except Exception:  # pylint: disable=broad-except
+                    logger.exception("Cannot update watch %s", watch.route)
+                if watch.key in self.watches:
+                    self.__schedule(watch.key, now + watch.interval)
+        return len(due)
+
+    def run(self) -> None:
+        "Fetch the watches when they are due, until `stop` is called."
+        while not self.stopped.is_set():
+            self.run_pending()
+            if not self.queue:
+                break
+            self.stopped.wait(max(0.0, self.queue[0][0] - self.clock()))
+
+    def stop(self) -> None:
+        self.stopped.set()
+
+    def __schedule(self, key: str, time_: float) -> None:
+        self.due[key] = time_
+        heapq.heappush(self.queue, (time_, key))
+
+    def __update(self, watch: Watch, journeys: List[Journey]) -> None:
+        initial = watch.key not in self.store.digests
+        diffs = self.store.update(watch.key, journeys, now=self.clock())
+        if diffs is None or (initial and not self.emit_initial):
+            return
+        if self.changes_only:
+            diffs = [x for x in diffs if x.diff_type != JourneyDiffType.NoChange]
+        if not diffs:
+            return
+        # The snapshot is already updated: a failing sink must not prevent
+        # the other sinks from receiving the diffs, which are not computed again.
+        for sink in self.sinks:
+            try:
+                sink.emit(watch, diffs)
+            except Exception:  # pylint: disable=broad-except
+                logger.exception(
+                    "Cannot emit %s diffs of watch %s to %s",
+                    len(diffs),
+                    watch.route,
+                    type(sink).__name__,
+                )
+
+    def close(self) -> None:
+        for sink in self.sinks:
+            sink.close()
+        self.store.close()
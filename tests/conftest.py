@@ -0,0 +1,31 @@
+import datetime as dt
+import random
+
+import attr
+import pytest
+from faker import Faker
+
+from locomotive.models import Journey
+
+paris = dt.timezone(dt.timedelta(hours=1))
+
+
+@pytest.fixture
+def journeys():
+    "200 fake journeys, with aware dates and journeys without proposals."
+    random.seed(42)
+    Faker.seed(42)
+    journeys = [Journey.fake() for _ in range(200)]
+    journeys[0] = attr.evolve(
+        journeys[0],
+        segments=tuple(
+            attr.evolve(
+                x,
+                departure_date=x.departure_date.replace(tzinfo=paris),
+                arrival_date=x.arrival_date.replace(tzinfo=paris),
+            )
+            for x in journeys[0].segments
+        ),
+    )
+    journeys[1] = attr.evolve(journeys[1], proposals=())
+    return journeys
@@ -1,9 +1,14 @@
+import copy
 import datetime as dt
+import pickle
 
 import pytest
 from locomotive.diff import JourneyDiff, JourneyDiffType, journeys_diff
 from locomotive.models import Journey, Proposal, Segment, Transport
 from locomotive.stores import Stations
+from money.currency import Currency
+from money.exceptions import CurrencyMismatchError
+from money.money import Money
 
 
 @pytest.fixture
@@ -44,6 +49,26 @@ def test_journey_base(segments, proposals):
     assert {journey, journey} == {journey}
 
 
+def test_journey_key(segments, proposals):
+    journey = Journey(segments, proposals)
+    assert journey.key == (
+        "0000",
+        "FRFEV",
+        "FRJFU",
+        1546300800,
+        "0000",
+        "FRFEV",
+        "FRJFU",
+        1546307100,
+    )
+    # Same journey, with other prices: same key and hash, but not equal.
+    repriced = Journey(segments, proposals[:1])
+    assert (repriced.key, hash(repriced)) == (journey.key, hash(journey))
+    assert repriced != journey
+    assert len({journey, repriced}) == 2
+    assert Journey(segments[:1], proposals).key != journey.key
+
+
 def test_journey_dates(segments, proposals):
     journey = Journey(segments, proposals)
     assert journey.departure_date == dt.datetime(2019, 1, 1, 0)
@@ -66,6 +91,23 @@ def test_journey_lowest_price(segments, proposals):
     assert journey.lowest_price == 10.0
 
 
+@pytest.mark.parametrize(
+    "copier", [copy.deepcopy, lambda x: pickle.loads(pickle.dumps(x))]
+)
+def test_journey_lowest_price_copy(segments, proposals, copier):
+    journey = copier(Journey(segments, proposals))
+    assert journey.lowest_price == 10.0
+    assert copier(Journey(segments, [])).lowest_price is None
+
+    proposals = (
+        Proposal("FLEX", Money("10", Currency.EUR)),
+        Proposal("FLEX", Money("10", Currency.USD)),
+    )
+    journey = copier(Journey(segments, proposals))
+    with pytest.raises(CurrencyMismatchError):
+        journey.lowest_price
+
+
 # TODO: Move in dedicated file
 def test_journey_diff(segments, proposals):
     old = Journey(segments, proposals)
@@ -0,0 +1,82 @@
+import datetime as dt
+
+from money.currency import Currency
+from money.money import Money
+
+from locomotive.analytics import (
+    cheapest_flexibility,
+    cheapest_per_day,
+    cheapest_per_hour,
+    price_percentiles,
+)
+from locomotive.models import Journey, Proposal, Segment, Station, Transport
+
+brest = Station("Brest", "brest", "FRBES", "BST", 48.38, -4.48)
+paris = Station("Paris", "paris", "FRPAR", "", 48.85, 2.34)
+lyon = Station("Lyon", "lyon", "FRLYS", "", 45.76, 4.83)
+
+
+def journey(i, destination, prices):
+    departure = dt.datetime(2020, 1, 1) + dt.timedelta(minutes=20 * i)
+    segment = Segment(
+        Transport("TGA", "TGV", str(1000 + i), "TRAIN"),
+        brest,
+        destination,
+        departure,
+        departure + dt.timedelta(hours=3),
+    )
+    proposals = tuple(
+        Proposal(level, Money(price, Currency.EUR))
+        for level, price in zip(["NOFLEX", "SEMIFLEX", "FLEX"], prices)
+    )
+    return Journey((segment,), proposals)
+
+
+journeys = [
+    journey(0, paris, ["30", "45"]),
+    journey(1, paris, ["25.5", "25.5"]),
+    journey(2, paris, []),
+    journey(3, lyon, ["80", "60", "90"]),
+    journey(4, lyon, ["50"]),
+    journey(5, paris, ["99"]),
+]
+
+
+def test_cheapest_per_hour():
+    cheapest = cheapest_per_hour(journeys)
+    assert cheapest.to_journeys() == [journeys[1], journeys[4]]
+
+
+def test_cheapest_per_day():
+    next_day = [journey(72, paris, ["40"]), journey(73, lyon, ["35", "20"])]
+    assert cheapest_per_day(journeys + next_day) == {
+        dt.date(2020, 1, 1): journeys[1],
+        dt.date(2020, 1, 2): next_day[1],
+    }
+
+
+def test_price_percentiles():
+    percentiles = price_percentiles(journeys, percentiles=[0, 50, 100])
+    assert percentiles == {
+        ("FRBES", "FRPAR"): {0: 2550, 50: 3000, 100: 9900},
+        ("FRBES", "FRLYS"): {0: 5000, 50: 5500, 100: 6000},
+    }
+    # Linear interpolation between the closest ranks.
+    assert price_percentiles(journeys, [25])["FRBES", "FRPAR"] == {25: 2775}
+
+
+def test_cheapest_flexibility():
+    assert cheapest_flexibility(journeys) == [
+        "NOFLEX",
+        "NOFLEX",
+        None,
+        "SEMIFLEX",
+        "NOFLEX",
+        "NOFLEX",
+    ]
+
+
+def test_lowest_price_is_cached():
+    assert journeys[3].lowest_price == Money("60", Currency.EUR)
+    assert journeys[3].lowest_price is journeys[3].lowest_price
+    assert journeys[2].lowest_price is None
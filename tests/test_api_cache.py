@@ -0,0 +1,72 @@
+import datetime as dt
+
+import attr
+import pytest
+from test_client import TimetableClient, travel_request
+
+from locomotive.api.cache import CachedClient, MemoryCache, SQLiteCache
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, tmp_path):
+    if request.param == "memory":
+        return MemoryCache()
+    return SQLiteCache(tmp_path / "cache.sqlite")
+
+
+def test_cached_client_ttl(backend):
+    client, clock = TimetableClient(), Clock()
+    with CachedClient(client, backend, ttl=60, clock=clock) as cached:
+        assert cached.travel_request(travel_request()) == client.journeys[:5]
+        assert cached.travel_request(travel_request()) == client.journeys[:5]
+        assert client.requests == 1
+        # A different request is cached separately.
+        req = attr.evolve(travel_request(), date=dt.datetime(2020, 1, 1, 12))
+        assert cached.travel_request(req) == client.journeys[36:41]
+        assert client.requests == 2
+        clock.now = 61
+        cached.travel_request(travel_request())
+        assert client.requests == 3
+        assert (cached.stats.hits, cached.stats.misses) == (1, 3)
+
+
+def test_cached_client_stale_while_revalidate(backend):
+    client, clock = TimetableClient(), Clock()
+    with CachedClient(client, backend, ttl=60, stale_ttl=60, clock=clock) as cached:
+        cached.travel_request(travel_request())
+        clock.now = 90
+        assert cached.travel_request(travel_request()) == client.journeys[:5]
+        cached.executor.shutdown(wait=True)
+        assert client.requests == 2
+        assert cached.stats.stale_hits == 1
+        assert cached.stats.refreshes == 1
+        # The refreshed entry is fresh until t=150.
+        clock.now = 149
+        cached.travel_request(travel_request())
+        assert client.requests == 2
+        assert cached.stats.hits == 1
+
+
+def test_sqlite_cache_persists(tmp_path):
+    client = TimetableClient()
+    with CachedClient(client, SQLiteCache(tmp_path / "cache.sqlite")) as cached:
+        cached.travel_request(travel_request())
+    with CachedClient(client, SQLiteCache(tmp_path / "cache.sqlite")) as cached:
+        assert cached.travel_request(travel_request()) == client.journeys[:5]
+    assert client.requests == 1
+
+
+def test_sqlite_cache_purge(tmp_path):
+    backend = SQLiteCache(tmp_path / "cache.sqlite")
+    with CachedClient(TimetableClient(), backend, ttl=60, stale_ttl=60) as cached:
+        cached.travel_request(travel_request())
+        assert backend.purge() == 0
+        assert backend.purge(now=cached.clock() + 121) == 1
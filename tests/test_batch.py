@@ -0,0 +1,91 @@
+import datetime as dt
+
+from test_client import TimetableClient
+
+from locomotive.api.batch import BatchItem, BatchSearch, read_batch_csv
+from locomotive.api.ratelimit import TokenBucket
+from locomotive.stores import Stations
+
+stations = Stations()
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += seconds
+
+
+def test_token_bucket():
+    clock = Clock()
+    bucket = TokenBucket(rate=2, burst=4, clock=clock, sleep=clock.sleep)
+    for _ in range(4):
+        bucket.acquire()
+    assert clock.now == 0
+    for _ in range(4):
+        bucket.acquire()
+    assert clock.now == 2
+
+
+def batch_items():
+    return [
+        BatchItem(origin, destination, dt.datetime(2020, 1, 1, hour))
+        for origin, destination in [("FRBES", "FRPAR"), ("Brest", "Lyon")]
+        for hour in range(0, 24, 6)
+    ]
+
+
+def test_batch_search():
+    client = TimetableClient()
+    client.max_iter = 100
+    search = BatchSearch(client, stations, max_workers=4, endpoint_concurrency=2)
+    results = list(search.run(batch_items()))
+    assert len(results) == 8
+    assert {x.item for x in results} == set(batch_items())
+    for result in results:
+        assert result.error is None
+        assert result.request.date == result.item.date
+        assert result.request.arrival_station.name.startswith(
+            "Paris" if result.item.origin == "FRBES" else "Lyon"
+        )
+        assert result.journeys == client.journeys
+
+
+def test_batch_search_checkpoint(tmp_path):
+    checkpoint = tmp_path / "checkpoint.jsonl"
+    client = TimetableClient()
+    search = BatchSearch(client, stations, max_workers=1, checkpoint=checkpoint)
+    results = search.run(batch_items())
+    first = [next(results) for _ in range(3)]
+    results.close()
+
+    # The last result handed over before the interruption is fetched again,
+    # as it may not have been processed by the consumer.
+    search = BatchSearch(client, stations, checkpoint=checkpoint)
+    rest = list(search.run(batch_items()))
+    assert len(rest) == 6
+    assert {x.item for x in first + rest} == set(batch_items())
+
+    search = BatchSearch(client, stations, checkpoint=checkpoint)
+    assert list(search.run(batch_items())) == []
+
+
+def test_read_batch_csv(tmp_path):
+    path = tmp_path / "batch.csv"
+    path.write_text("origin,destination,date\nFRBES,FRPAR,2020-01-01T08:00\n")
+    (item,) = read_batch_csv(path)
+    assert (item.origin, item.destination) == ("FRBES", "FRPAR")
+    assert item.date.isoformat() == "2020-01-01T08:00:00+01:00"
+
+
+def test_batch_search_endpoint_limits_are_shared():
+    class EndpointClient(TimetableClient):
+        ENDPOINT = "https://example.org/limits"
+
+    first = BatchSearch(EndpointClient(), stations, endpoint_concurrency=2)
+    second = BatchSearch(EndpointClient(), stations, endpoint_concurrency=4)
+    assert first.limited.limiters[1] is second.limited.limiters[1]
@@ -0,0 +1,31 @@
+import pytest
+from locomotive.cache import MISSING, LRUCache
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(maxsize=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+
+    assert "a" in cache
+    assert "b" not in cache
+    assert len(cache) == 2
+    assert cache.stats.evictions == 1
+
+
+def test_lru_cache_counts_hits_and_misses():
+    cache = LRUCache()
+    assert cache.get("a") is MISSING
+    assert cache.get_or_put("a", lambda: None) is None
+    assert cache.get_or_put("a", lambda: 1) is None
+
+    assert cache.stats.hits == 1
+    assert cache.stats.misses == 2
+    assert cache.stats.hit_rate == pytest.approx(1 / 3)
+
+
+def test_lru_cache_requires_positive_size():
+    with pytest.raises(ValueError):
+        LRUCache(maxsize=0)
@@ -1,5 +1,30 @@
+import datetime as dt
+
 from click.testing import CliRunner
+from locomotive.api.client import TravelClient
 from locomotive.cli import cli
+from locomotive.models import Journey, Proposal, Segment, Transport
+from money.currency import Currency
+from money.money import Money
+
+
+class DailyClient(TravelClient):
+    "Returns a single journey per day, at 08:00, and records the requested days."
+
+    def __init__(self):
+        self.days = set()
+
+    def travel_request(self, req):
+        self.days.add(req.date.date())
+        departure = req.date.replace(hour=8, minute=0)
+        segment = Segment(
+            Transport("TGA", "TGV", "8000", "TRAIN"),
+            req.departure_station,
+            req.arrival_station,
+            departure,
+            departure + dt.timedelta(hours=3),
+        )
+        return [Journey((segment,), (Proposal("NOFLEX", Money("10", Currency.EUR)),))]
 
 
 def test_helper():
@@ -58,6 +83,32 @@ def test_search_with_formatter_provided():
     assert result.exit_code == 0
 
 
+def test_search_date_range_ends_on_the_last_day(monkeypatch):
+    client = DailyClient()
+    monkeypatch.setattr(
+        "locomotive.cli.commands.search.Client", lambda stations: client
+    )
+    runner = CliRunner()
+    result = runner.invoke(
+        cli,
+        [
+            "search",
+            "Brest",
+            "Paris",
+            "--from-date",
+            "2019-06-01",
+            "--to-date",
+            "2019-06-02 10:00",
+        ],
+    )
+
+    assert result.exit_code == 0
+    assert client.days == {dt.date(2019, 6, 1), dt.date(2019, 6, 2)}
+    assert "to Jun 02 2019" in result.output
+    assert "Sun Jun 02 2019  08:00" in result.output
+    assert "Jun 03" not in result.output
+
+
 def test_live():
     runner = CliRunner()
     result = runner.invoke(cli, ["live", "Lyon Part-Dieu"])
@@ -0,0 +1,145 @@
+import asyncio
+import datetime as dt
+import threading
+import time
+from typing import List
+
+from locomotive.api.client import AsyncTravelClient, TravelClient
+from locomotive.api.requests import TravelRequest
+from locomotive.models import Journey, Passenger, Proposal, Segment, Station, Transport
+
+origin = Station("Brest", "brest", "FRBES", "BST", 48.38, -4.48)
+destination = Station("Paris", "paris", "FRPAR", "", 48.85, 2.34)
+
+
+class TimetableClient(TravelClient):
+    """
+    Returns pages of 5 journeys from a timetable with a train every 20 minutes,
+    departing after the requested date.
+    """
+
+    def __init__(self, days: int = 1) -> None:
+        self.requests = 0
+        self.lock = threading.Lock()
+        day = dt.datetime(2020, 1, 1)
+        self.journeys = [
+            Journey(
+                (
+                    Segment(
+                        Transport("TGA", "TGV", str(1000 + i), "TRAIN"),
+                        origin,
+                        destination,
+                        day + dt.timedelta(minutes=20 * i),
+                        day + dt.timedelta(minutes=20 * i + 180),
+                    ),
+                ),
+                (Proposal("NOFLEX", 10.0 + i),),
+            )
+            for i in range(72 * days)
+        ]
+
+    def travel_request(self, req: TravelRequest) -> List[Journey]:
+        with self.lock:
+            self.requests += 1
+        return [x for x in self.journeys if x.departure_date >= req.date][:5]
+
+
+def travel_request():
+    return TravelRequest(
+        origin, destination, [Passenger.dummy()], dt.datetime(2020, 1, 1), "second"
+    )
+
+
+def test_travel_request_iter_fetches_full_day():
+    client = TimetableClient()
+    client.max_iter = 100
+    journeys = list(client.travel_request_iter(travel_request()))
+    assert journeys == client.journeys
+
+
+def test_travel_request_iter_concurrent_matches_sequential():
+    client = TimetableClient()
+    journeys = list(client.travel_request_iter_concurrent(travel_request(), windows=6))
+    assert journeys == client.journeys
+
+
+class OverlappingClient(TimetableClient):
+    "Pages also include the journeys departing up to an hour before the date."
+
+    def travel_request(self, req: TravelRequest) -> List[Journey]:
+        with self.lock:
+            self.requests += 1
+        since = req.date - dt.timedelta(hours=1)
+        return [x for x in self.journeys if x.departure_date >= since][:5]
+
+
+def test_travel_request_iter_concurrent_deduplicates_windows():
+    client = OverlappingClient()
+    client.max_iter = 100
+    journeys = list(client.travel_request_iter_concurrent(travel_request(), windows=6))
+    assert journeys == client.journeys
+
+
+class SlowClient(TimetableClient):
+    def travel_request(self, req: TravelRequest) -> List[Journey]:
+        time.sleep(0.05)
+        return super().travel_request(req)
+
+
+def test_travel_request_iter_concurrent_stops_early():
+    client = SlowClient()
+    client.max_iter = 100
+    journeys = client.travel_request_iter_concurrent(
+        travel_request(), windows=6, max_workers=1
+    )
+    start = time.monotonic()
+    next(journeys)
+    journeys.close()
+    # Closing does not wait for the other windows to be fetched.
+    assert time.monotonic() - start < 0.5
+    time.sleep(0.2)
+    requests = client.requests
+    time.sleep(0.2)
+    # Only the page in flight in the second window is fetched after closing.
+    assert client.requests == requests <= 5
+
+
+def test_travel_request_range():
+    client = TimetableClient(days=3)
+    client.max_iter = 100
+    journeys = list(
+        client.travel_request_range(travel_request(), dt.datetime(2020, 1, 3))
+    )
+    assert journeys == client.journeys
+
+    journeys = client.travel_request_range(travel_request(), dt.datetime(2020, 1, 2))
+    assert list(journeys) == client.journeys[:144]
+
+
+def test_async_travel_client_mirrors_sync_client():
+    client = TimetableClient()
+    client.max_iter = 100
+    async_client = AsyncTravelClient(client, max_concurrency=4)
+
+    async def fetch():
+        page = await async_client.travel_request(travel_request())
+        journeys = [x async for x in async_client.travel_request_iter(travel_request())]
+        full = await async_client.travel_request_full(travel_request())
+        return page, journeys, full
+
+    loop = asyncio.new_event_loop()
+    try:
+        page, journeys, full = loop.run_until_complete(fetch())
+    finally:
+        loop.close()
+        async_client.close()
+
+    assert page == client.journeys[:5]
+    assert journeys == full == client.journeys
+
+
+def test_travel_request_iter_stream():
+    client = TimetableClient()
+    client.max_iter = 100
+    journeys = list(client.travel_request_iter(travel_request(), stream=True))
+    assert journeys == client.journeys
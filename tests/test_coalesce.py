@@ -0,0 +1,80 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from test_client import TimetableClient, travel_request
+
+from locomotive.api.client import AsyncTravelClient
+from locomotive.api.coalesce import (
+    AsyncCoalescingClient,
+    CoalescingClient,
+    SingleFlight,
+)
+
+
+class SlowClient(TimetableClient):
+    def travel_request(self, req):
+        time.sleep(0.1)
+        return super().travel_request(req)
+
+
+def test_single_flight_shares_exceptions():
+    flight = SingleFlight()
+    barrier = threading.Barrier(4)
+
+    def fail():
+        time.sleep(0.1)
+        raise ValueError("upstream")
+
+    def call():
+        barrier.wait()
+        return flight.do("key", fail)
+
+    with ThreadPoolExecutor(4) as executor:
+        futures = [executor.submit(call) for _ in range(4)]
+        for future in futures:
+            with pytest.raises(ValueError):
+                future.result()
+    assert flight.calls == {}
+
+
+def test_coalescing_client():
+    client = SlowClient()
+    coalescing = CoalescingClient(client)
+    barrier = threading.Barrier(8)
+
+    def call():
+        barrier.wait()
+        return coalescing.travel_request(travel_request())
+
+    with ThreadPoolExecutor(8) as executor:
+        results = list(executor.map(lambda _: call(), range(8)))
+    assert all(x == client.journeys[:5] for x in results)
+    assert client.requests == 1
+    assert coalescing.flight.coalesced == 7
+
+    # Requests are not coalesced once the call has completed.
+    coalescing.travel_request(travel_request())
+    assert client.requests == 2
+
+
+def test_async_coalescing_client():
+    client = SlowClient()
+    coalescing = AsyncCoalescingClient(AsyncTravelClient(client))
+
+    async def fetch():
+        requests = [coalescing.travel_request(travel_request()) for _ in range(8)]
+        return await asyncio.gather(*requests)
+
+    loop = asyncio.new_event_loop()
+    try:
+        results = loop.run_until_complete(fetch())
+    finally:
+        loop.close()
+        coalescing.close()
+
+    assert all(x == client.journeys[:5] for x in results)
+    assert client.requests == 1
+    assert coalescing.flight.calls == {}
@@ -0,0 +1,49 @@
+import attr
+import pytest
+from test_client import TimetableClient
+
+from locomotive.diff import JourneyDiffType, iter_journeys_diff, journeys_diff
+from locomotive.models import Proposal
+
+
+def summary(diffs):
+    return sorted(
+        ((x.old or x.new).key, x.diff_type.name, x.old is None, x.new is None)
+        for x in diffs
+    )
+
+
+def snapshots():
+    old = TimetableClient(days=2).journeys
+    new = list(old)
+    del new[10]
+    new[20] = attr.evolve(new[20], proposals=(Proposal("NOFLEX", 1.0),))
+    new[30] = attr.evolve(new[30], proposals=())
+    # A journey departing at the same time as another one.
+    segment = attr.evolve(new[40].segments[0], transport=new[50].segments[0].transport)
+    new.insert(41, attr.evolve(new[40], segments=(segment,)))
+    return old, new
+
+
+def test_iter_journeys_diff_matches_journeys_diff():
+    old, new = snapshots()
+    diffs = list(iter_journeys_diff(iter(old), iter(new)))
+    assert summary(diffs) == summary(journeys_diff(old, new))
+    departures = [(x.new or x.old).departure_date for x in diffs]
+    assert departures == sorted(departures)
+
+    changes = list(iter_journeys_diff(old, new, changes_only=True))
+    assert [x.diff_type for x in changes] == [
+        JourneyDiffType.Removed,
+        JourneyDiffType.LowerPrice,
+        JourneyDiffType.Unavailable,
+        JourneyDiffType.Added,
+    ]
+    assert list(iter_journeys_diff(old, [], changes_only=True)) != []
+    assert list(iter_journeys_diff(old, old, changes_only=True)) == []
+
+
+def test_iter_journeys_diff_requires_sorted_journeys():
+    old, _ = snapshots()
+    with pytest.raises(ValueError):
+        list(iter_journeys_diff(old, old[::-1]))
@@ -0,0 +1,50 @@
+import datetime as dt
+import json
+
+import attr
+
+from locomotive.cli.formatters import (
+    JSONFormatter,
+    JSONLinesFormatter,
+    PrettyFormatter,
+)
+from locomotive.models import Proposal
+
+
+def test_json_lines_formatter_matches_json_formatter(journeys):
+    # Prices can also be floats.
+    journeys[2] = attr.evolve(journeys[2], proposals=(Proposal("NOFLEX", 12.5),))
+    output = []
+    JSONFormatter().print(journeys, fn=output.append)
+    expected = json.loads(output[0])
+
+    lines = []
+    formatter = JSONLinesFormatter()
+    formatter.max_fragments = 10
+    formatter.print(journeys, fn=lines.append)
+    assert [json.loads(x) for x in lines] == expected
+
+
+def test_pretty_formatter_buffer(journeys):
+    journeys = journeys[:20]
+    output = []
+    PrettyFormatter().print(journeys, fn=output.append)
+    assert len(output) == 20
+    assert "<b>" not in output[0]
+    assert output[0].startswith("\033[1mProposal")
+
+    chunks = []
+    PrettyFormatter(buffer_size=1000).print(journeys, fn=chunks.append)
+    assert 1 < len(chunks) < 20
+    assert "\n".join(chunks) == "\n".join(output)
+
+
+def test_pretty_formatter_dates_with_different_offsets():
+    # The same instant, in London and in Paris.
+    london = dt.datetime(2020, 6, 1, 8, 1, tzinfo=dt.timezone(dt.timedelta(hours=1)))
+    paris = dt.datetime(2020, 6, 1, 9, 1, tzinfo=dt.timezone(dt.timedelta(hours=2)))
+    assert london == paris
+    assert PrettyFormatter.format_time(paris) == "09h01"
+    assert PrettyFormatter.format_time(london) == "08h01"
+    assert PrettyFormatter.format_datetime(paris) == "01/06/2020 09h01"
+    assert PrettyFormatter.format_datetime(london) == "01/06/2020 08h01"
@@ -1,6 +1,15 @@
 import json
 
-from locomotive.api.oui_v3 import Client
+from money.currency import Currency
+from money.money import Money
+
+from locomotive.api.oui_v3 import (
+    Client,
+    loads,
+    strptime_sncf,
+    strptime_sncf_slow,
+    to_money,
+)
 from locomotive.stores import Stations
 
 stations = Stations()
@@ -16,3 +25,41 @@ def test_travel_request_1():
     assert journeys[1].segments[1].transport.label == "TGV"
     assert journeys[1].segments[1].transport.number == "5224"
     assert journeys[1].segments[1].transport.type == "TRAIN"
+
+
+def test_fast_parsing_matches_strptime():
+    with open("tests/traces/ios_oui6904_frlys_frnte.res.json", "rb") as f:
+        data = f.read()
+    res = json.loads(data)
+    assert loads(data) == res
+    dates = [
+        segment[key]
+        for journey in res["journeys"]
+        for segment in journey["segments"]
+        for key in ("departureDate", "arrivalDate")
+    ]
+    dates += [
+        "2019-06-23T16:18:00.000+02:00",
+        "2019-06-23T16:18:59.123-05:30",
+        "2020-03-29T01:59:00.000+00:00",
+        "2020-03-29T01:59:00.000000+0100",
+    ]
+    for date in dates:
+        fast, slow = strptime_sncf(date), strptime_sncf_slow(date)
+        assert (fast, fast.utcoffset(), repr(fast)) == (
+            slow,
+            slow.utcoffset(),
+            repr(slow),
+        )
+
+    journeys = client.parse_response(res)
+    segments = [x for journey in journeys for x in journey.segments]
+    for segment, date in zip(segments, dates[::2]):
+        assert segment.departure_date == strptime_sncf_slow(date)
+
+
+def test_fast_money_matches_money():
+    for value, currency in [(45, "EUR"), (45.0, "EUR"), (12.5, "EUR"), (12.5, "USD")]:
+        money = to_money(value, currency)
+        expected = Money(str(value), Currency(currency))
+        assert (money, repr(money)) == (expected, repr(expected))
@@ -0,0 +1,89 @@
+import io
+
+import pytest
+import requests
+
+from locomotive.api.scheduler import (
+    AdaptiveLimiter,
+    RetryPolicy,
+    Scheduler,
+    retry_after,
+)
+
+URL = "https://example.org/api"
+
+
+def response(status, headers=None):
+    res = requests.Response()
+    res.status_code = status
+    res.raw = io.BytesIO()
+    res.headers.update(headers or {})
+    return res
+
+
+class Upstream:
+    "Replays a list of responses (or exceptions)."
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+
+    def __call__(self):
+        res = self.responses.pop(0)
+        if isinstance(res, Exception):
+            raise res
+        return res
+
+
+def test_scheduler_retries():
+    sleeps = []
+    scheduler = Scheduler(sleep=sleeps.append)
+    upstream = Upstream(
+        requests.ConnectionError(),
+        response(429, {"Retry-After": "7"}),
+        response(503),
+        response(200),
+    )
+    assert scheduler.execute(URL, upstream).status_code == 200
+    assert len(sleeps) == 3
+    assert sleeps[1] == 7
+    metrics = scheduler.metrics()["example.org"]
+    assert (metrics.requests, metrics.successes, metrics.failures) == (4, 1, 3)
+    assert (metrics.retries, metrics.throttled) == (3, 1)
+
+
+def test_scheduler_gives_up():
+    scheduler = Scheduler(retry=RetryPolicy(max_retries=1), sleep=lambda _: None)
+    upstream = Upstream(response(500), response(502))
+    assert scheduler.execute(URL, upstream).status_code == 502
+    upstream = Upstream(requests.Timeout(), requests.Timeout())
+    with pytest.raises(requests.Timeout):
+        scheduler.execute(URL, upstream)
+    # Retry-After above the maximum backoff is not honored.
+    sleeps = []
+    scheduler = Scheduler(sleep=sleeps.append)
+    upstream = Upstream(response(429, {"Retry-After": "86400"}), response(200))
+    assert scheduler.execute(URL, upstream).status_code == 429
+    assert sleeps == []
+    # Other errors are not retried.
+    assert scheduler.execute(URL, Upstream(response(404))).status_code == 404
+
+
+def test_adaptive_limiter():
+    limiter = AdaptiveLimiter(initial=4, maximum=6, target_latency=1)
+    for _ in range(8):
+        limiter.acquire()
+        limiter.release(True, 0.1)
+    assert 5 <= limiter.limit <= 6
+    limiter.acquire()
+    limiter.release(False, 0.1)
+    assert 2.5 <= limiter.limit <= 3
+    limiter.acquire()
+    limiter.release(True, 2)
+    assert limiter.limit < 1.5
+
+
+def test_retry_after():
+    assert retry_after(None) is None
+    assert retry_after("120") == 120
+    assert retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0
+    assert retry_after("soon") is None
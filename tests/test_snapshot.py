@@ -0,0 +1,56 @@
+import attr
+import pytest
+
+from locomotive.snapshot import Snapshot, write_snapshot
+from locomotive.stores import Stations
+
+
+@pytest.fixture
+def snapshot_journeys(journeys):
+    "Journeys with stations with missing values."
+    segment = journeys[0].segments[0]
+    journeys[0] = attr.evolve(
+        journeys[0],
+        segments=(
+            attr.evolve(
+                segment,
+                departure_station=Stations().find_or_raise("Brest"),
+                arrival_station=attr.evolve(segment.arrival_station, longitude=None),
+            ),
+        ),
+    )
+    # Station without coordinates in the stations database.
+    segment = journeys[2].segments[0]
+    vievola = Stations().find_or_raise("Vievola")
+    assert vievola.latitude == ""
+    journeys[2] = attr.evolve(
+        journeys[2], segments=(attr.evolve(segment, arrival_station=vievola),)
+    )
+    return journeys
+
+
+def test_snapshot_round_trip(tmp_path, snapshot_journeys):
+    journeys = snapshot_journeys
+    path = tmp_path / "journeys.snap"
+    assert write_snapshot(path, journeys) == len(journeys)
+    with Snapshot(path) as snapshot:
+        assert len(snapshot) == len(journeys)
+        assert list(snapshot) == journeys
+        assert snapshot[-1] == journeys[-1]
+        assert snapshot[10:20] == journeys[10:20]
+        with pytest.raises(IndexError):
+            snapshot[len(journeys)]
+
+
+def test_snapshot_empty(tmp_path):
+    path = tmp_path / "journeys.snap"
+    write_snapshot(path, [])
+    with Snapshot(path) as snapshot:
+        assert list(snapshot) == []
+
+
+def test_snapshot_invalid_file(tmp_path):
+    path = tmp_path / "journeys.json"
+    path.write_text("[]" * 10)
+    with pytest.raises(ValueError):
+        Snapshot(path)
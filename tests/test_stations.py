@@ -1,6 +1,9 @@
+import sqlite3
+import threading
+
 import pytest
 from locomotive.exceptions import StationNotFoundException
-from locomotive.stores import Stations
+from locomotive.stores import Stations, normalize, normalize_many
 
 
 def test_can_load_default_data_if_no_path_provided():
@@ -60,3 +63,111 @@ def test_can_compute_distance_between_two_stations():
 
     assert distance > 456
     assert distance < 457
+
+
+def test_index_returns_same_station_as_sql_search():
+    stations = Stations()
+    indexed = Stations(index=True)
+
+    for query in ["Paris", "Lyon", "Le Porage", "Jeumont Frontière", "St Etienne"]:
+        assert indexed.find_by_name(query) == stations.find_by_name(query)
+
+    assert indexed.find_by_name("This station doesn't exist") is None
+
+
+def test_connections_are_reused_and_closed():
+    with Stations() as stations:
+        assert stations.find("FRFEV")
+        assert stations.find("Le Porage")
+        assert len(stations.connections) == 1
+
+        thread = threading.Thread(target=stations.find, args=("FRJFU",))
+        thread.start()
+        thread.join()
+        assert len(stations.connections) == 2
+
+    assert not stations.connections
+
+
+def test_lookups_are_cached():
+    stations = Stations(cache_size=16)
+
+    assert stations.find("FRFEV") == stations.find("FRFEV")
+    assert stations.find_or_create("Nowhere") == stations.find_or_create("Nowhere")
+
+    assert stations.cache.stats.hits == 2
+    assert stations.cache.stats.misses == 2
+
+
+def test_cache_can_be_disabled():
+    stations = Stations(cache_size=0)
+    assert stations.cache is None
+    assert stations.find("FRFEV")
+
+
+def test_legacy_database_is_upgraded(tmp_path):
+    path = tmp_path.joinpath("stations.sqlite3")
+    with sqlite3.connect(str(path)) as conn:
+        conn.executescript(Stations.schema)
+        conn.execute(
+            "INSERT INTO stations VALUES (?,?,?,?,?,?,?)",
+            ("Brest", "outdated", "FR", "FRBES", "BST", 48.38, -4.48),
+        )
+
+    stations = Stations(path)
+
+    assert stations.version() == Stations.current_version()
+    assert stations.find_by_id("frbes").name_norm == "brest"
+    assert stations.find_by_tvs_id("BST").sncf_id == "FRBES"
+    assert stations.find_by_name("Brest").sncf_id == "FRBES"
+
+
+def test_can_build_database_from_local_csv(tmp_path):
+    csv_path = tmp_path.joinpath("stations.csv")
+    csv_path.write_text(
+        "id;name;country;sncf_id;sncf_tvs_id;latitude;longitude\n"
+        "1;Brest;FR;FRBES;BST;48.38;-4.48\n"
+        "2;Paris Montparnasse;FR;FRPMO;PMO;48.84;2.32\n",
+        encoding="utf-8",
+    )
+    path = tmp_path.joinpath("stations.sqlite3")
+
+    Stations.build_from_csv(path, csv_path)
+
+    assert sorted(x.name for x in tmp_path.iterdir()) == [
+        "stations.csv",
+        "stations.sqlite3",
+    ]
+    stations = Stations(path)
+    assert stations.count() == 2
+    assert stations.find("Montparnasse").sncf_id == "FRPMO"
+
+
+def test_normalize_many_matches_normalize_on_all_stations():
+    stations = Stations()
+    names = [row[0] for row in stations.fetchall("SELECT name FROM stations")]
+    names += ["Paris-Gare-de-Lyon", "Aéroport Charles-de-Gaulle", "Clermont Fd."]
+
+    assert normalize_many(names) == [normalize(name) for name in names]
+
+
+def test_can_find_many_stations_at_once():
+    stations = Stations(cache_size=0)
+    queries = ["FRFEV", "frjfu", "Le Porage", "This station doesn't exist"]
+
+    found = stations.find_many(queries)
+
+    assert list(found) == queries[:3]
+    for query in queries[:3]:
+        assert found[query] == stations.find(query)
+
+
+def test_find_many_or_create_and_or_raise():
+    stations = Stations()
+
+    created = stations.find_many_or_create(["FRFEV", "Nowhere"])
+    assert created["FRFEV"].sncf_id == "FRFEV"
+    assert created["Nowhere"] == stations.find_or_create("Nowhere")
+
+    with pytest.raises(StationNotFoundException):
+        stations.find_many_or_raise(["FRFEV", "This station doesn't exist"])
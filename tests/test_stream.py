@@ -0,0 +1,74 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import attr
+import pytest
+
+from locomotive.api.oui_v3 import Client
+from locomotive.api.stream import iter_json_array
+from locomotive.stores import Stations
+
+TRACE = "tests/traces/ios_oui6904_frlys_frnte.res.json"
+
+
+def chunked(data, size):
+    return [data[i : i + size] for i in range(0, len(data), size)]
+
+
+@pytest.mark.parametrize("size", [1, 7, 1024, 1 << 20])
+def test_iter_json_array(size):
+    with open(TRACE, "rb") as f:
+        data = f.read()
+    expected = json.loads(data)["journeys"]
+    assert list(iter_json_array(chunked(data, size), "journeys")) == expected
+
+
+def test_iter_json_array_edge_cases():
+    chunks = [b'{"a": 12', b'3, "j": [1, 2', b'5, {"x": "\xc3', b'\xa9"}] , "z": 1}']
+    assert list(iter_json_array(chunks, "j")) == [1, 25, {"x": "é"}]
+    assert list(iter_json_array([b'{"a": {"j": [1]}, "j": []}'], "j")) == []
+    assert list(iter_json_array([b'{"a": []}'], "j")) == []
+    with pytest.raises(ValueError):
+        list(iter_json_array([b'{"j": [1, 2'], "j"))
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        with open(TRACE, "rb") as f:
+            body = f.read()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for chunk in chunked(body, 4096):
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+        self.wfile.write(b"0\r\n\r\n")
+
+    def log_message(self, *args):
+        pass
+
+
+def test_travel_request_stream():
+    server = HTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    client = Client(Stations())
+    client.ENDPOINT = "http://127.0.0.1:{}".format(server.server_port)
+    try:
+        streamed = list(client.request_stream({}))
+        journeys = list(map(client.parse_journey, streamed))
+    finally:
+        server.shutdown()
+        server.server_close()
+        client.transport.close()
+
+    with open(TRACE) as f:
+        res = json.load(f)
+    assert streamed == res["journeys"]
+    expected = client.parse_response(res)
+    assert list(map(attr.astuple, journeys)) == list(map(attr.astuple, expected))
@@ -0,0 +1,64 @@
+import datetime as dt
+
+import attr
+from money.currency import Currency
+from money.money import Money
+
+from locomotive.models import Journey, Proposal
+from locomotive.table import NO_PRICE, JourneyTable
+
+
+def test_journey_table_round_trip(journeys):
+    table = JourneyTable.from_journeys(journeys)
+    assert len(table) == len(journeys)
+    assert table.to_journeys() == journeys
+    assert table[0] == journeys[0]
+    assert table[0].departure_date.utcoffset() == dt.timedelta(hours=1)
+
+
+def test_journey_table_columns(journeys):
+    table = JourneyTable.from_journeys(journeys)
+    assert table.column("origin") == [x.departure_station.sncf_id for x in journeys]
+    assert table.column("number")[0] == "/".join(
+        x.transport.number for x in journeys[0].segments
+    )
+    prices = [x.lowest_price.sub_units if x.proposals else NO_PRICE for x in journeys]
+    assert table.column("price") == prices
+
+
+def test_journey_table_operations(journeys):
+    table = JourneyTable.from_journeys(journeys)
+
+    cheap = table.where("price", lambda x: 0 <= x < 3000)
+    assert cheap.to_journeys() == [
+        x for x in journeys if x.lowest_price and x.lowest_price.sub_units < 3000
+    ]
+
+    by_departure = table.sort("departure")
+    assert by_departure.to_journeys() == sorted(
+        journeys, key=lambda x: (x.departure_date.replace(tzinfo=None))
+    )
+
+    top = table.top_k(5)
+    expected = sorted(
+        (x for x in journeys if x.proposals), key=lambda x: x.lowest_price
+    )
+    assert top.to_journeys() == expected[:5]
+
+    groups = table.group_by("destination")
+    assert sum(len(x) for x in groups.values()) == len(journeys)
+    for destination, group in groups.items():
+        assert all(x.arrival_station.sncf_id == destination for x in group)
+
+
+def test_journey_table_prices():
+    journey = Journey.fake()
+    journey = attr.evolve(
+        journey,
+        proposals=(
+            Proposal("NOFLEX", Money("12.5", Currency.EUR)),
+            Proposal("FLEX", 15.0),
+        ),
+    )
+    (copy,) = JourneyTable.from_journeys([journey])
+    assert copy == journey
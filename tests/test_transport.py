@@ -0,0 +1,48 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+
+from locomotive.api.transport import HTTPTransport
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    clients = set()
+
+    def do_GET(self):
+        self.clients.add(self.client_address)
+        body = json.dumps({"path": self.path}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Set-Cookie", "session=1")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class Server(ThreadingMixIn, HTTPServer):
+    # Do not wait for kept-alive connections on shutdown.
+    daemon_threads = True
+
+
+def test_transport_reuses_connections():
+    server = Server(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    url = "http://127.0.0.1:{}".format(server.server_port)
+
+    try:
+        with HTTPTransport() as transport:
+            for i in range(3):
+                res = transport.request("GET", "{}/{}".format(url, i))
+                assert res.json() == {"path": "/{}".format(i)}
+            assert not transport.session.cookies
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert len(Handler.clients) == 1
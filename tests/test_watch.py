@@ -0,0 +1,130 @@
+import io
+import json
+
+import attr
+from test_client import TimetableClient, travel_request
+
+from locomotive.diff import JourneyDiffType
+from locomotive.models import Proposal
+from locomotive.watch import JSONLinesSink, SnapshotStore, Watcher
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class ListSink:
+    def __init__(self) -> None:
+        self.diffs = []
+
+    def emit(self, watch, diffs):
+        self.diffs.extend(diffs)
+
+    def close(self):
+        pass
+
+
+class FailingSink:
+    def emit(self, watch, diffs):
+        raise OSError("No space left on device")
+
+    def close(self):
+        pass
+
+
+def test_snapshot_store(tmp_path):
+    client = TimetableClient()
+    store = SnapshotStore(tmp_path / "watch.db")
+    journeys = client.journeys[:10]
+    assert len(store.update("a", journeys)) == 10
+    assert store.update("a", journeys) is None
+
+    # Re-price a journey, remove another.
+    new = [attr.evolve(journeys[0], proposals=(Proposal("NOFLEX", 5.0),))]
+    new += journeys[2:]
+    diffs = store.update("a", new)
+    types = {x.diff_type for x in diffs}
+    assert types == {
+        JourneyDiffType.LowerPrice,
+        JourneyDiffType.Removed,
+        JourneyDiffType.NoChange,
+    }
+    store.close()
+
+    # The snapshots are persisted.
+    store = SnapshotStore(tmp_path / "watch.db")
+    assert store.update("a", new) is None
+    assert sorted(store.journeys("a"), key=lambda x: x.departure_date) == new
+    assert store.journeys("b") == []
+
+
+def test_snapshot_store_round_trip(tmp_path, journeys):
+    store = SnapshotStore(tmp_path / "watch.db")
+    store.update("a", journeys)
+    store.close()
+    store = SnapshotStore(tmp_path / "watch.db")
+    # Aware and naive dates, prices in euros and journeys without proposals.
+    assert sorted(store.journeys("a"), key=lambda x: x.key) == sorted(
+        journeys, key=lambda x: x.key
+    )
+    store.remove("a")
+    assert store.journeys("a") == []
+
+
+def test_watcher():
+    client = TimetableClient()
+    client.max_iter = 100
+    clock = Clock()
+    stream = io.StringIO()
+    sink = ListSink()
+    watcher = Watcher(
+        client, SnapshotStore(), [sink, JSONLinesSink(stream)], clock=clock
+    )
+    watcher.add(travel_request(), interval=60)
+    watcher.add(attr.evolve(travel_request(), travel_class="first"), interval=120)
+
+    # The first results are recorded without being emitted.
+    assert watcher.run_pending() == 2
+    assert watcher.run_pending() == 0
+    assert sink.diffs == []
+
+    client.journeys[3] = attr.evolve(
+        client.journeys[3], proposals=(Proposal("NOFLEX", 100.0),)
+    )
+    del client.journeys[5]
+    clock.now = 60
+    assert watcher.run_pending() == 1
+    assert [x.diff_type for x in sink.diffs] == [
+        JourneyDiffType.HigherPrice,
+        JourneyDiffType.Removed,
+    ]
+    events = [json.loads(x) for x in stream.getvalue().splitlines()]
+    assert events[0]["type"] == "HigherPrice"
+    assert events[0]["watch"] == "FRBES-FRPAR@2020-01-01"
+    assert events[0]["new_price"] == 100.0
+
+    clock.now = 120
+    assert watcher.run_pending() == 2
+    assert len(sink.diffs) == 4
+    watcher.close()
+
+
+def test_watcher_failing_sink():
+    client = TimetableClient()
+    client.max_iter = 100
+    clock = Clock()
+    sink = ListSink()
+    watcher = Watcher(client, SnapshotStore(), [FailingSink(), sink], clock=clock)
+    watcher.add(travel_request(), interval=60)
+    watcher.run_pending()
+
+    del client.journeys[5]
+    clock.now = 60
+    assert watcher.run_pending() == 1
+    # The other sinks still receive the diffs.
+    assert [x.diff_type for x in sink.diffs] == [JourneyDiffType.Removed]
+    watcher.close()